@@ -1,87 +1,133 @@
-import sqlite3
-from fastapi import FastAPI
-from typing import List, Dict, Any
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import json
+import math
+import numpy as np
+from collections import OrderedDict
+from fastapi import FastAPI, HTTPException, Request
+from datetime import date, timedelta
+from typing import Dict, Any, Optional
+from db_handler import init_db, get_generation, ReadConnectionPool, READ_POOL_SIZE, HISTORY_RETENTION_DAYS
+from scoring import (
+    DEFAULT_WEIGHTS, MAX_WEIGHT_MAGNITUDE,
+    resolve_weights, metric_columns, score_columns, top_indices
+)
 
 DB_PATH = "workflow_trends.db"
 TOP_LIMIT = 20
 
-app = FastAPI(title="Workflow Trends API")
+# Rankings are served straight from the (source, popularity_score) index
+RANKED_QUERY = """
+    SELECT id, source, term, workflow, platform, metrics_json, created_at, popularity_score
+    FROM workflow_trends
+    WHERE source = ?
+    ORDER BY popularity_score DESC
+    LIMIT ?
+"""
 
+# Full source load used when a request overrides the scoring weights
+SOURCE_ROWS_QUERY = """
+    SELECT id, source, term, workflow, platform, metrics_json, created_at
+    FROM workflow_trends
+    WHERE source = ?
+    ORDER BY id
+"""
 
-def score_forum(popularity_metrics: dict) -> float:
-    """
-    Combine forum metrics into a single popularity score.
-    - Views: baseline weight
-    - Replies: weighted more since it means engagement
-    - Likes: weighted similarly to replies
-    - Unique contributors: strong indicator of discussion quality
-    """
-    views = popularity_metrics.get("views", 0)
-    replies = popularity_metrics.get("replies", 0)
-    likes = popularity_metrics.get("likes", 0)
-    contributors = popularity_metrics.get("unique_contributors", 0)
+# Metrics that /trending can compute growth for, per source
+GROWTH_METRICS = {
+    "google": ("avg_interest", "latest_interest"),
+    "forum": ("views", "replies", "likes", "unique_contributors"),
+    "youtube": ("views", "likes", "comments", "like_to_view_ratio", "comment_to_view_ratio"),
+}
 
-    score = (
-        (views * 1.0) +           
-        (replies * 20.0) +        
-        (likes * 10.0) +         
-        (contributors * 30.0)    
+# Date of a source's latest ingest (history snapshots are deduplicated, so
+# the newest snapshot can be older than the data)
+LAST_REFRESH_QUERY = """
+    SELECT snapshot_date
+    FROM source_refresh
+    WHERE source = ?
+"""
+
+# Current value vs. value as of a baseline date, one index seek per workflow,
+# ranked by delta; workflows without a baseline (NULL delta) sort last.
+# MATERIALIZED keeps SQLite from inlining the CTE, which would repeat the
+# baseline subquery for every reference to baseline_value.
+GROWTH_QUERY = """
+    WITH growth AS MATERIALIZED (
+        SELECT t.natural_key, t.term, t.workflow, t.platform,
+               json_extract(t.metrics_json, ?1) AS current_value,
+               (
+                   SELECT json_extract(h.metrics_json, ?1)
+                   FROM workflow_metrics_history h
+                   WHERE h.source = t.source
+                     AND h.natural_key = t.natural_key
+                     AND h.snapshot_date <= ?2
+                   ORDER BY h.snapshot_date DESC
+                   LIMIT 1
+               ) AS baseline_value
+        FROM workflow_trends t
+        WHERE t.source = ?3
     )
-    return score
+    SELECT natural_key, term, workflow, platform, current_value, baseline_value,
+           current_value - baseline_value AS delta,
+           CASE WHEN baseline_value != 0
+                THEN (current_value - baseline_value) * 1.0 / baseline_value
+           END AS growth_rate
+    FROM growth
+    ORDER BY delta IS NULL, delta DESC, natural_key
+    LIMIT ?4
+"""
 
 
-def score_google(metrics: dict) -> float:
-    """
-    Combine avg_interest, latest_interest, and trend.
-    Weight latest interest slightly more than average.
-    Give a small bonus/penalty for trend.
-    """
-    avg_interest = metrics.get("avg_interest", 0)
-    latest_interest = metrics.get("latest_interest", 0)
-    trend = metrics.get("trend", "stable")
+# Shared pool of read-only connections, opened at startup
+read_pool = None
+_read_pool_lock = threading.Lock()
 
-    trend_bonus = 0
-    if trend == "up":
-        trend_bonus = 10  
-    elif trend == "down":
-        trend_bonus = -5  
+# SQLite work runs on this executor so it never blocks the event loop.
+# Sized to the read pool: more threads would only queue for a connection.
+db_executor = None
 
-    score = (avg_interest * 0.4) + (latest_interest * 0.6) + trend_bonus
-    return score
 
+def get_read_pool() -> ReadConnectionPool:
+    """Return the shared read pool, creating it on first use."""
+    global read_pool
+    with _read_pool_lock:
+        if read_pool is None:
+            read_pool = ReadConnectionPool(DB_PATH)
+        return read_pool
 
-def score_youtube(popularity_metrics: dict) -> float:
-    """
-    Combine YouTube metrics fairly.
-    Views are baseline, likes and comments have stronger weight.
-    Ratios (like_to_view, comment_to_view) normalize engagement.
-    """
-    views = popularity_metrics.get("views", 0)
-    likes = popularity_metrics.get("likes", 0)
-    comments = popularity_metrics.get("comments", 0)
-    like_ratio = popularity_metrics.get("like_to_view_ratio", 0)
-    comment_ratio = popularity_metrics.get("comment_to_view_ratio", 0)
 
-    score = (
-        (views * 1.0) +
-        (likes * 20.0) +
-        (comments * 30.0) +
-        (like_ratio * 5000) +     
-        (comment_ratio * 8000)   
-    )
-    return score
+async def run_db(fn, *args):
+    """Run a blocking database function on the DB executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, fn, *args)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global read_pool, db_executor
+    # Make sure the schema (popularity_score column + index, WAL mode) is up to date
+    init_db()
+    get_read_pool()
+    db_executor = ThreadPoolExecutor(max_workers=READ_POOL_SIZE, thread_name_prefix="db")
+    yield
+    db_executor.shutdown(wait=True)
+    db_executor = None
+    read_pool.close()
+    read_pool = None
+
+app = FastAPI(title="Workflow Trends API", lifespan=lifespan)
 
 
 def query_db(query: str, params=()) -> list[dict]:
     """
     Run a query on SQLite database and return results as a list of dictionaries.
+    Uses a pooled read-only connection instead of opening a new one per query.
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
+    with get_read_pool().connection() as conn:
+        rows = conn.execute(query, params).fetchall()
     return [dict(row) for row in rows]
 
 @app.get("/")
@@ -89,36 +135,268 @@ def root():
     """Basic health check route."""
     return {"status": "ok", "message": "Workflow Trends API is running."}
 
+def current_generation() -> int:
+    """
+    Read the data generation counter that db_handler.insert_results bumps.
+    """
+    with get_read_pool().connection() as conn:
+        return get_generation(conn)
+
+
+# Response cache: (endpoint, params) -> response, valid for _cache_generation only
+_response_cache: Dict[tuple, Any] = {}
+# Re-weighted rankings: the key space is chosen by clients, so it is an LRU
+# capped at RESCORED_CACHE_SIZE entries
+RESCORED_CACHE_SIZE = 256
+_rescored_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+_cache_generation = None
+_cache_lock = threading.Lock()
+
+
+def _sync_cache_generation(generation: int):
+    """Drop every cached response if the data generation moved (hold _cache_lock)."""
+    global _cache_generation
+    if generation != _cache_generation:
+        _response_cache.clear()
+        _rescored_cache.clear()
+        _cache_generation = generation
+
+
+def cached_response(endpoint: str, params: tuple, build):
+    """
+    Return the cached response for (endpoint, params), building it with
+    build() on a miss. The whole cache is dropped as soon as the data
+    generation changes, so a refresh is visible on the very next request.
+    Only use this for keys from a small, fixed set.
+    """
+    generation = current_generation()
+    key = (endpoint, params)
+    with _cache_lock:
+        _sync_cache_generation(generation)
+        if key in _response_cache:
+            return _response_cache[key]
+
+    response = build()
+    with _cache_lock:
+        if generation == _cache_generation:
+            _response_cache[key] = response
+    return response
+
+
+def cached_rescored_response(key: tuple, build):
+    """
+    Like cached_response, but for client-chosen keys (weight overrides):
+    entries live in a bounded LRU, so arbitrary weights cannot grow memory.
+    """
+    generation = current_generation()
+    with _cache_lock:
+        _sync_cache_generation(generation)
+        if key in _rescored_cache:
+            _rescored_cache.move_to_end(key)
+            return _rescored_cache[key]
+
+    response = build()
+    with _cache_lock:
+        if generation == _cache_generation:
+            _rescored_cache[key] = response
+            while len(_rescored_cache) > RESCORED_CACHE_SIZE:
+                _rescored_cache.popitem(last=False)
+    return response
+
+
+def get_ranked(source: str) -> list[dict]:
+    """
+    Return the top TOP_LIMIT rows for a source, ranked by precomputed popularity_score.
+    """
+    return query_db(RANKED_QUERY, (source, TOP_LIMIT))
+
+
+def ranked_response(source: str) -> dict:
+    """Build the endpoint payload for a source, served from the response cache."""
+    def build():
+        top_rows = get_ranked(source)
+        return {"source": source, "count": len(top_rows), "results": top_rows}
+    return cached_response(source, (TOP_LIMIT,), build)
+
+
+def source_columns(source: str):
+    """
+    Load every row of a source plus its metrics as NumPy column arrays.
+    Cached per data generation, so a source is parsed once per refresh no
+    matter how many weightings are requested against it.
+    """
+    def build():
+        rows = query_db(SOURCE_ROWS_QUERY, (source,))
+        metrics_list = [json.loads(row["metrics_json"]) for row in rows]
+        return rows, metric_columns(source, metrics_list)
+    return cached_response(f"{source}:columns", (), build)
+
+
+def rescored_response(source: str, overrides: dict) -> dict:
+    """
+    Rank a source with caller-supplied weights using the vectorized scorer.
+    """
+    weights = resolve_weights(source, overrides)
+
+    def build():
+        rows, columns = source_columns(source)
+        with np.errstate(over="ignore"):
+            scores = score_columns(columns, weights)
+        if not np.isfinite(scores).all():
+            raise ValueError("Weights are too large: scores overflow")
+        top_rows = []
+        for i in top_indices(scores, TOP_LIMIT):
+            row = dict(rows[i])
+            row["popularity_score"] = float(scores[i])
+            top_rows.append(row)
+        return {"source": source, "weights": weights, "count": len(top_rows), "results": top_rows}
+    return cached_rescored_response((source, TOP_LIMIT, tuple(sorted(weights.items()))), build)
+
+
+async def source_response(source: str, request: Optional[Request] = None, **weight_params) -> dict:
+    """
+    Serve a source endpoint. Requests without w_* overrides use the
+    precomputed SQL ranking; anything else is re-scored in memory.
+    FastAPI ignores undeclared query parameters, so w_* names the source
+    has no weight for are rejected here from the raw `request`.
+    """
+    if request is not None:
+        unknown = sorted(
+            name for name in request.query_params
+            if name.startswith("w_") and name[len("w_"):] not in DEFAULT_WEIGHTS[source]
+        )
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown weights for {source}: {', '.join(unknown)}; "
+                       f"expected w_ plus one of {list(DEFAULT_WEIGHTS[source])}"
+            )
+    overrides = {
+        name[len("w_"):]: value
+        for name, value in weight_params.items()
+        if value is not None
+    }
+    if not overrides:
+        return await run_db(ranked_response, source)
+    invalid = sorted(
+        f"w_{name}" for name, value in overrides.items()
+        if not math.isfinite(value) or abs(value) > MAX_WEIGHT_MAGNITUDE
+    )
+    if invalid:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Weights must be finite numbers within ±{MAX_WEIGHT_MAGNITUDE:g}: {', '.join(invalid)}"
+        )
+    try:
+        return await run_db(rescored_response, source, overrides)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/google")
-def get_google_workflows():
-    rows = query_db("SELECT * FROM workflow_trends WHERE source = 'google'")
-    for row in rows:
-        row["popularity_score"] = score_google(eval(row["metrics_json"]))
-    sorted_rows = sorted(rows, key=lambda r: r["popularity_score"], reverse=True)
-    top_rows = sorted_rows[:TOP_LIMIT]
-    return {"source": "google", "count": len(top_rows), "results": top_rows}
+async def get_google_workflows(
+    request: Request,
+    w_avg_interest: Optional[float] = None,
+    w_latest_interest: Optional[float] = None,
+    w_trend_up: Optional[float] = None,
+    w_trend_down: Optional[float] = None
+):
+    return await source_response(
+        "google",
+        request,
+        w_avg_interest=w_avg_interest,
+        w_latest_interest=w_latest_interest,
+        w_trend_up=w_trend_up,
+        w_trend_down=w_trend_down
+    )
 
 @app.get("/forum")
-def get_forum_workflows():
-    rows = query_db("SELECT * FROM workflow_trends WHERE source = 'forum'")
-    for row in rows:
-        row["popularity_score"] = score_forum(eval(row["metrics_json"]))
-    sorted_rows = sorted(rows, key=lambda r: r["popularity_score"], reverse=True)
-    top_rows = sorted_rows[:TOP_LIMIT]
-    return {"source": "forum", "count": len(top_rows), "results": top_rows}
+async def get_forum_workflows(
+    request: Request,
+    w_views: Optional[float] = None,
+    w_replies: Optional[float] = None,
+    w_likes: Optional[float] = None,
+    w_unique_contributors: Optional[float] = None
+):
+    return await source_response(
+        "forum",
+        request,
+        w_views=w_views,
+        w_replies=w_replies,
+        w_likes=w_likes,
+        w_unique_contributors=w_unique_contributors
+    )
 
 @app.get("/youtube")
-def get_youtube_workflows():
-    rows = query_db("SELECT * FROM workflow_trends WHERE source = 'youtube'")
-    for row in rows:
-        row["popularity_score"] = score_youtube(eval(row["metrics_json"]))
-    sorted_rows = sorted(rows, key=lambda r: r["popularity_score"], reverse=True)
-    return {"source": "youtube", "count": len(sorted_rows), "results": sorted_rows}
+async def get_youtube_workflows(
+    request: Request,
+    w_views: Optional[float] = None,
+    w_likes: Optional[float] = None,
+    w_comments: Optional[float] = None,
+    w_like_to_view_ratio: Optional[float] = None,
+    w_comment_to_view_ratio: Optional[float] = None
+):
+    return await source_response(
+        "youtube",
+        request,
+        w_views=w_views,
+        w_likes=w_likes,
+        w_comments=w_comments,
+        w_like_to_view_ratio=w_like_to_view_ratio,
+        w_comment_to_view_ratio=w_comment_to_view_ratio
+    )
 
 @app.get("/all")
-def get_all_sources():
+async def get_all_sources():
+    # The three sources are independent, so fetch and rank them in parallel
+    google, forum, youtube = await asyncio.gather(
+        source_response("google"),
+        source_response("forum"),
+        source_response("youtube")
+    )
     return {
-        "google": get_google_workflows(),
-        "forum": get_forum_workflows(),
-        "youtube": get_youtube_workflows()
+        "google": google,
+        "forum": forum,
+        "youtube": youtube
     }
+
+
+def growth_response(source: str, metric: str, days: int) -> dict:
+    """
+    Rank a source's workflows by how much `metric` grew over the last `days`
+    days of history (e.g. days=1 for day-over-day views delta).
+    The window ends at the source's latest ingest; workflows with no
+    snapshot that old have no baseline and are listed last.
+    Ranking and the limit are applied in SQL.
+    """
+    def build():
+        refresh = query_db(LAST_REFRESH_QUERY, (source,))
+        if not refresh:
+            return {"source": source, "metric": metric, "days": days, "count": 0, "results": []}
+        latest = refresh[0]["snapshot_date"]
+        baseline_date = (date.fromisoformat(latest) - timedelta(days=days)).isoformat()
+        top_rows = query_db(GROWTH_QUERY, (f"$.{metric}", baseline_date, source, TOP_LIMIT))
+        return {
+            "source": source,
+            "metric": metric,
+            "days": days,
+            "as_of": latest,
+            "baseline_date": baseline_date,
+            "count": len(top_rows),
+            "results": top_rows
+        }
+    return cached_response(f"trending:{source}", (metric, days, TOP_LIMIT), build)
+
+@app.get("/trending/{source}")
+async def get_trending(source: str, metric: str = "views", days: int = 1):
+    """Workflows with the largest metric growth over the last `days` days."""
+    if source not in GROWTH_METRICS:
+        raise HTTPException(status_code=404, detail=f"Unknown source: {source}")
+    if metric not in GROWTH_METRICS[source]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown metric '{metric}' for {source}; expected one of {list(GROWTH_METRICS[source])}"
+        )
+    # Older snapshots are not kept, and far-back dates overflow date arithmetic
+    if not 1 <= days <= HISTORY_RETENTION_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {HISTORY_RETENTION_DAYS}")
+    return await run_db(growth_response, source, metric, days)
@@ -0,0 +1,105 @@
+"""
+Compare the "fast" (vocabulary PhraseMatcher) and "transformer"
+(en_core_web_trf NER) extraction modes of description_processor.
+
+Reports throughput for both modes and the recall of the fast mode, using
+the transformer's terms as the reference. The corpus is the workflow titles
+stored in workflow_trends.db, optionally extended with JSON files holding a
+list of strings or of objects with title/blurb/description fields (such as
+initial_forum_topics.json or initial_videos.json).
+
+Usage (from the project root):
+    python benchmarks/extraction_benchmark.py [extra_corpus.json ...]
+"""
+import json
+import os
+import sqlite3
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import description_processor  # noqa: E402
+
+DB_PATH = os.path.join(PROJECT_ROOT, "workflow_trends.db")
+# The transformer is slow on CPU, so recall is measured on a sample
+TRANSFORMER_SAMPLE = 200
+# Repeat the fast pass over the corpus so timings are not dominated by noise
+FAST_REPEATS = 20
+
+
+def load_corpus(paths):
+    """
+    Collect texts: workflow titles from the database plus any JSON corpora.
+    """
+    texts = []
+    if os.path.exists(DB_PATH):
+        conn = sqlite3.connect(DB_PATH)
+        texts.extend(row[0] for row in conn.execute(
+            "SELECT workflow FROM workflow_trends WHERE workflow IS NOT NULL"
+        ))
+        conn.close()
+    for path in paths:
+        with open(path) as f:
+            for item in json.load(f):
+                if isinstance(item, str):
+                    texts.append(item)
+                else:
+                    parts = [item.get(k, "") for k in ("title", "blurb", "description")]
+                    texts.append(" ".join(p for p in parts if p))
+    return [t for t in texts if t.strip()]
+
+
+def throughput(fn, texts, repeats=1):
+    """Return (results of the last run, texts per second)."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        results = fn(texts)
+    elapsed = time.perf_counter() - start
+    return results, (len(texts) * repeats) / elapsed
+
+
+def main():
+    texts = load_corpus(sys.argv[1:])
+    if not texts:
+        print("No texts found to benchmark.")
+        sys.exit(1)
+    print(f"Corpus: {len(texts)} texts")
+
+    # Build the matcher outside the timed section
+    description_processor.get_matcher()
+    fast_results, fast_rate = throughput(description_processor.extract_search_terms_fast, texts, FAST_REPEATS)
+    matched = sum(1 for terms in fast_results if terms)
+    print(f"fast:        {fast_rate:>10.1f} texts/s, matched {matched}/{len(texts)} texts")
+
+    sample = texts[:TRANSFORMER_SAMPLE]
+    try:
+        description_processor.get_nlp()
+    except OSError as e:
+        print(f"transformer: skipped ({e})")
+        return
+
+    def transformer(batch):
+        return description_processor.extract_search_terms_transformer(batch, n_process=1, use_cache=False)
+
+    trf_results, trf_rate = throughput(transformer, sample)
+    print(f"transformer: {trf_rate:>10.1f} texts/s (sample of {len(sample)})")
+    print(f"speedup:     {fast_rate / trf_rate:>10.1f}x")
+
+    reference = found = fast_total = fast_agreed = 0
+    for fast_terms, trf_terms in zip(fast_results, trf_results):
+        fast_set = {t.lower() for t in fast_terms}
+        trf_set = {t.lower() for t in trf_terms}
+        reference += len(trf_set)
+        found += len(trf_set & fast_set)
+        fast_total += len(fast_set)
+        fast_agreed += len(fast_set & trf_set)
+    if reference:
+        print(f"recall vs transformer:    {found / reference:.1%} ({found}/{reference} terms)")
+    if fast_total:
+        print(f"fast terms also in trf:   {fast_agreed / fast_total:.1%} ({fast_agreed}/{fast_total} terms)")
+
+
+if __name__ == "__main__":
+    main()
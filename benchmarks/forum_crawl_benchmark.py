@@ -0,0 +1,167 @@
+"""
+Crawl a local stub Discourse server with n8n_forum_handler's crawler.
+
+The stub serves the category (paginated), topic and search endpoints the
+handler uses, with a configurable latency, and enforces its own rate limit by answering
+429 with Retry-After like Discourse does. Topics carry an ETag and
+answer If-None-Match with 304. The benchmark reports the achieved request
+rate, how many requests were throttled, how the topic-detail cache was
+used, and checks that every topic came back with its metrics. Listings
+carry bumped_at / last_posted_at / posts_count; later crawls simulate the
+next daily run, after activity on a tenth of the topics, in incremental
+and full mode.
+
+Usage (from the project root):
+    python benchmarks/forum_crawl_benchmark.py [topic_count]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import n8n_forum_handler  # noqa: E402
+
+TOPIC_COUNT = 60
+LATENCY_SECONDS = 0.2
+# Topics per category listing page, as on Discourse
+PAGE_SIZE = 30
+# The stub's own limit; the crawler is configured slightly above it so
+# Retry-After handling is exercised
+SERVER_REQUESTS_PER_SECOND = 20
+CRAWLER_REQUESTS_PER_SECOND = 25
+
+
+class StubDiscourse(BaseHTTPRequestHandler):
+    topic_count = TOPIC_COUNT
+    lock = threading.Lock()
+    window_start = time.monotonic()
+    window_requests = 0
+    served = 0
+    throttled = 0
+    # Topics that got new activity since the first run
+    bumped = set()
+
+    @classmethod
+    def listing(cls, topic_id, **fields):
+        posts_count = topic_id % 5 + 1 + (topic_id in cls.bumped)
+        bumped_at = f"2026-01-{2 if topic_id in cls.bumped else 1:02d}T00:00:00Z"
+        return {"id": topic_id, "bumped_at": bumped_at, "last_posted_at": bumped_at,
+                "posts_count": posts_count, **fields}
+
+    def allow(self):
+        cls = type(self)
+        with cls.lock:
+            now = time.monotonic()
+            if now - cls.window_start >= 1.0:
+                cls.window_start = now
+                cls.window_requests = 0
+            cls.window_requests += 1
+            if cls.window_requests > SERVER_REQUESTS_PER_SECOND:
+                cls.throttled += 1
+                return False
+            cls.served += 1
+            return True
+
+    def send_json(self, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self.allow():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        time.sleep(LATENCY_SECONDS)
+        url = urlparse(self.path)
+        if url.path.endswith("/l/top.json"):
+            page = int(parse_qs(url.query).get("page", ["0"])[0])
+            ids = range(page * PAGE_SIZE, min((page + 1) * PAGE_SIZE, self.topic_count))
+            topic_list = {"topics": [self.listing(i, title=f"Topic {i}", excerpt="Slack to Notion") for i in ids]}
+            if ids.stop < self.topic_count:
+                topic_list["more_topics_url"] = f"/c/built-with-n8n/15/l/top?page={page + 1}"
+            self.send_json({"topic_list": topic_list})
+        elif url.path.startswith("/t/"):
+            topic_id = int(url.path.split("/")[2].split(".")[0])
+            etag = f'W/"topic-{topic_id}-{topic_id in self.bumped}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            posts = [{"username": f"user{j}", "like_count": 1} for j in range(self.listing(topic_id)["posts_count"])]
+            self.send_json({"id": topic_id, "views": topic_id * 10, "reply_count": topic_id % 5, "post_stream": {"posts": posts}},
+                           headers={"ETag": etag})
+        elif url.path == "/search.json":
+            term = parse_qs(url.query).get("q", [""])[0]
+            start = sum(map(ord, term)) % self.topic_count
+            self.send_json({"topics": [self.listing((start + k) % self.topic_count, title=term) for k in range(5)]})
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    StubDiscourse.topic_count = int(sys.argv[1]) if len(sys.argv) > 1 else TOPIC_COUNT
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubDiscourse)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    n8n_forum_handler.DISCOURSE_BASE_URL = f"http://127.0.0.1:{server.server_port}"
+    n8n_forum_handler.REQUESTS_PER_SECOND = CRAWLER_REQUESTS_PER_SECOND
+    n8n_forum_handler.REQUEST_BURST = CRAWLER_REQUESTS_PER_SECOND
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    n8n_forum_handler.FORUM_CACHE_PATH = os.path.join(workdir, "forum_cache.db")
+
+    start = time.perf_counter()
+    topics = n8n_forum_handler.collect_initial_topics()
+    specific = n8n_forum_handler.search_specific_terms_with_topics([f"term {i}" for i in range(10)])
+    elapsed = time.perf_counter() - start
+    served = StubDiscourse.served
+    print(f"First run topic cache: {dict(n8n_forum_handler.topic_cache_stats)}")
+
+    # Next runs: nothing memoized, but every topic is in the persistent cache.
+    # The incremental crawl only fetches the topics that got activity; a full
+    # crawl revalidates every topic.
+    StubDiscourse.bumped = set(range(0, StubDiscourse.topic_count, 10))
+    for mode in ("incremental", "full"):
+        n8n_forum_handler.CRAWL_MODE = mode
+        n8n_forum_handler._topic_memo.clear()
+        n8n_forum_handler.topic_cache_stats.clear()
+        n8n_forum_handler.collect_initial_topics()
+        print(f"Second run ({mode}) topic cache: {dict(n8n_forum_handler.topic_cache_stats)}")
+    server.shutdown()
+
+    missing = [t["topicId"] for t in topics + specific if t["topicId"] and not t["views"]]
+    serial = served * (LATENCY_SECONDS + 2)
+    expected = min(StubDiscourse.topic_count, PAGE_SIZE * n8n_forum_handler.MAX_CATEGORY_PAGES)
+    print(f"Topics: {len(topics)} initial (expected {expected}), {len(specific)} from searches")
+    print(f"First run requests served: {served}, throttled with 429 (all runs): {StubDiscourse.throttled}")
+    print(f"First run elapsed: {elapsed:.1f}s ({served / elapsed:.1f} req/s, "
+          f"server limit {SERVER_REQUESTS_PER_SECOND} req/s); "
+          f"the old serial crawl with 2s sleeps would take ~{serial:.0f}s")
+    if missing or len(topics) != expected:
+        print(f"FAILED: {len(topics)} listed topics, no metrics for topics {missing}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Startup-time benchmark for the project's modules.
+
+Imports each module in a fresh interpreter several times and reports the
+median import time. Fails (exit code 1) if any import exceeds its budget or
+pulls in a heavy ML dependency (spaCy, torch, Whisper) at import time;
+those must only be loaded on first use.
+
+Usage (from the project root):
+    python benchmarks/startup_benchmark.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+# Module -> import-time budget in seconds
+MODULES = {
+    "db_handler": 1.0,
+    "description_processor": 1.0,
+    "google_search_handler": 2.0,
+    "n8n_forum_handler": 2.0,
+    "youtube_handler": 2.0,
+    "youtube_client": 1.0,
+    "http_utils": 1.0,
+    "checkpoints": 1.0,
+    "main": 1.0,
+    "api": 3.0,
+}
+
+# Modules that must not be imported as a side effect of importing ours
+HEAVY_MODULES = ("spacy", "torch", "whisper", "pytrends", "pandas")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def time_import(module):
+    """
+    Import `module` in a fresh interpreter and return (seconds, heavy modules loaded).
+    """
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout.strip().splitlines()[-1]
+    elapsed, _, heavy = output.partition(" ")
+    return float(elapsed), [m for m in heavy.split(",") if m]
+
+
+def main():
+    failures = []
+    print(f"{'module':<24}{'median (s)':>12}{'budget (s)':>12}  heavy imports")
+    for module, budget in MODULES.items():
+        try:
+            samples = [time_import(module) for _ in range(RUNS)]
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<24}{'error':>12}{budget:>12.2f}  {e.stderr.strip().splitlines()[-1]}")
+            failures.append(module)
+            continue
+        median = statistics.median(elapsed for elapsed, _ in samples)
+        heavy = sorted({m for _, loaded in samples for m in loaded})
+        print(f"{module:<24}{median:>12.3f}{budget:>12.2f}  {', '.join(heavy) or '-'}")
+        if median > budget or heavy:
+            failures.append(module)
+
+    if failures:
+        print(f"\nFAILED: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nAll imports within budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Replay interest_over_time() dataframes recorded with TRENDS_RECORD_DIR
+through google_search_handler's anchor-based rescaling and print the
+metrics per term. The rescaling itself is covered by
+tests/test_trends_batching.py.
+
+Usage (from the project root):
+    python benchmarks/trends_batching_check.py <recorded_dir>
+"""
+import glob
+import os
+import sys
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import google_search_handler as g  # noqa: E402
+
+
+def replay(directory):
+    frames = [pd.read_csv(path, index_col=0, parse_dates=True) for path in sorted(glob.glob(os.path.join(directory, "*.csv")))]
+    scaled = g.rescale_batches(frames)
+    for term, series in sorted(scaled.items(), key=lambda item: -item[1].mean()):
+        print(f"{term:<40}{g.series_metrics(series)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    replay(sys.argv[1])
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+
+# Stage outputs are stored as
+#   CHECKPOINT_DIR/<run id>/<handler>/<stage>.json
+# next to a per-handler manifest.json recording each completed stage's file
+# and checksum. Only one process writes a given handler's directory, so
+# handlers running in parallel never contend for a manifest.
+CHECKPOINT_DIR = "checkpoints"
+LATEST_FILE = "LATEST"
+MANIFEST_FILE = "manifest.json"
+# Older runs beyond this many are deleted when a new run starts
+CHECKPOINT_KEEP_RUNS = 7
+
+# main.py passes the run to its workers through the environment
+RUN_ID_ENV = "PIPELINE_RUN_ID"
+RESUME_ENV = "PIPELINE_RESUME"
+
+_manifest_lock = threading.Lock()
+# Handlers that have recomputed a stage in this process: their later stages
+# depend on the new output, so they are recomputed too
+_recomputed_handlers = set()
+
+
+def new_run_id():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+def current_run_id():
+    """
+    Return the run ID set by main.py, or None for a handler run on its own
+    (which is not checkpointed).
+    """
+    return os.environ.get(RUN_ID_ENV) or None
+
+
+def resume_enabled():
+    return os.environ.get(RESUME_ENV) == "1"
+
+
+def latest_run_id():
+    """Return the ID of the most recently started run, or None."""
+    try:
+        with open(os.path.join(CHECKPOINT_DIR, LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def start_run(run_id, resume=False):
+    """
+    Make `run_id` the current run for this process and its workers.
+    A new (non-resumed) run is recorded as the latest one, and runs older
+    than the last CHECKPOINT_KEEP_RUNS are removed.
+    """
+    os.environ[RUN_ID_ENV] = run_id
+    os.environ[RESUME_ENV] = "1" if resume else "0"
+    os.makedirs(os.path.join(CHECKPOINT_DIR, run_id), exist_ok=True)
+    if resume:
+        return
+    write_atomic(os.path.join(CHECKPOINT_DIR, LATEST_FILE), run_id.encode("utf-8"))
+    runs = sorted(
+        (entry for entry in os.scandir(CHECKPOINT_DIR) if entry.is_dir()),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in runs[:-CHECKPOINT_KEEP_RUNS]:
+        if entry.name != run_id:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def write_atomic(path, data):
+    """
+    Write bytes to `path` atomically: a temp file in the same directory is
+    fsynced and renamed over the target, so readers only ever see a
+    complete file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def handler_dir(handler, run_id=None):
+    return os.path.join(CHECKPOINT_DIR, run_id or current_run_id(), handler)
+
+
+def load_manifest(handler, run_id=None):
+    try:
+        with open(os.path.join(handler_dir(handler, run_id), MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_stage(handler, stage, data):
+    """
+    Store a stage's JSON-serializable output, then record it as complete in
+    the handler's manifest (both written atomically).
+    """
+    payload = json.dumps(data).encode("utf-8")
+    directory = handler_dir(handler)
+    filename = f"{stage}.json"
+    write_atomic(os.path.join(directory, filename), payload)
+    with _manifest_lock:
+        manifest = load_manifest(handler)
+        manifest[stage] = {
+            "file": filename,
+            "sha256": hashlib.sha256(payload).hexdigest(),
+            "bytes": len(payload),
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        write_atomic(os.path.join(directory, MANIFEST_FILE), json.dumps(manifest, indent=2).encode("utf-8"))
+
+
+def load_stage(handler, stage):
+    """
+    Return a stage's stored output if the manifest marks it complete and the
+    file still matches its checksum; otherwise None.
+    """
+    entry = load_manifest(handler).get(stage)
+    if not entry:
+        return None
+    try:
+        with open(os.path.join(handler_dir(handler), entry["file"]), "rb") as f:
+            payload = f.read()
+    except FileNotFoundError:
+        return None
+    if hashlib.sha256(payload).hexdigest() != entry["sha256"]:
+        print(f"Checkpoint {handler}/{stage} is corrupt; rerunning the stage")
+        return None
+    return json.loads(payload)
+
+
+def run_stage(handler, stage, fn, *args):
+    """
+    Run one pipeline stage with checkpointing.
+    Steps:
+      1. When resuming, return the stage's stored output if it is complete
+         and valid, skipping the work; once a handler has recomputed a stage,
+         its later stages are recomputed as well.
+      2. Otherwise run fn(*args) and store its output for a later resume.
+    Without a run ID (a handler run on its own rather than through main.py)
+    nothing is stored, so no checkpoint directories are left behind.
+    Stages must be called in pipeline order.
+    Returns the stage output.
+    """
+    if current_run_id() is None:
+        return fn(*args)
+    if resume_enabled() and handler not in _recomputed_handlers:
+        data = load_stage(handler, stage)
+        if data is not None:
+            print(f"Resuming {handler}: using checkpoint for stage '{stage}' (run {current_run_id()})")
+            return data
+    _recomputed_handlers.add(handler)
+    data = fn(*args)
+    save_stage(handler, stage, data)
+    return data
@@ -1,9 +1,24 @@
 import sqlite3
 import json
-from datetime import datetime
+import queue
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from scoring import score_metrics
 
 DB_PATH = "workflow_trends.db"
 
+# Read pool tuning (used by the API)
+READ_POOL_SIZE = 8
+BUSY_TIMEOUT_SECONDS = 30
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 16 * 1024
+
+# Metrics history retention: daily snapshots are kept for HISTORY_DAILY_DAYS,
+# then downsampled to one per week, and dropped after HISTORY_RETENTION_DAYS.
+HISTORY_DAILY_DAYS = 35
+HISTORY_RETENTION_DAYS = 365
+
 def init_db():
     """
     Initialize the database by creating the 'workflow_trends' table if it does not exist.
@@ -14,10 +29,31 @@ def init_db():
       - workflow: workflow title (for YouTube/forum)
       - platform: platform name, e.g., "YouTube" or "Forum"
       - metrics_json: JSON string storing popularity metrics or trend metrics
+      - popularity_score: score precomputed at insert time from metrics_json
+      - natural_key: platform ID (YouTube video ID, forum topic ID), else the
+        workflow title or search term (Google); unique per source
       - created_at: timestamp of insertion, defaults to current time
+
+    Also creates the (source, popularity_score) index used by the API to serve
+    rankings directly from SQL, switches the database to WAL journaling so
+    readers are never blocked by the writer, backfills scores for databases created
+    before the popularity_score column existed, adds the unique
+    (source, natural_key) index used for upserts, and creates the single-row
+    'data_generation' table that insert_results bumps on every refresh.
+
+    The 'workflow_metrics_history' table keeps one metrics snapshot per
+    (source, natural_key, snapshot_date), written only when metrics changed.
+    It is clustered on that key (WITHOUT ROWID), so "value as of date X" for a
+    workflow is a single index seek.
+
+    The 'source_refresh' table records the date of each source's latest
+    ingest. Snapshots are deduplicated, so the newest snapshot date is not
+    the date the data was last refreshed.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_SECONDS)
     cur = conn.cursor()
+    # WAL is persistent: once set, every connection to the file uses it
+    cur.execute("PRAGMA journal_mode=WAL")
     cur.execute("""
         CREATE TABLE IF NOT EXISTS workflow_trends (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -26,50 +62,338 @@ def init_db():
             workflow TEXT,               -- workflow title (for YT/forum)
             platform TEXT,               -- e.g. YouTube, Forum
             metrics_json TEXT NOT NULL,  -- store popularity or trend metrics as JSON
+            popularity_score REAL,       -- precomputed ranking score
+            natural_key TEXT,            -- workflow or term, unique per source
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(workflow_trends)")}
+    if "popularity_score" not in columns:
+        cur.execute("ALTER TABLE workflow_trends ADD COLUMN popularity_score REAL")
+        backfill_scores(cur)
+    if "natural_key" not in columns:
+        cur.execute("ALTER TABLE workflow_trends ADD COLUMN natural_key TEXT")
+        backfill_natural_keys(cur)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_workflow_trends_source_score
+        ON workflow_trends (source, popularity_score)
+    """)
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_workflow_trends_source_key
+        ON workflow_trends (source, natural_key)
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO data_generation (id, generation) VALUES (1, 0)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS workflow_metrics_history (
+            source TEXT NOT NULL,
+            natural_key TEXT NOT NULL,
+            snapshot_date TEXT NOT NULL,  -- YYYY-MM-DD of the run
+            metrics_json TEXT NOT NULL,
+            popularity_score REAL,
+            PRIMARY KEY (source, natural_key, snapshot_date)
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_source_date
+        ON workflow_metrics_history (source, snapshot_date)
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS source_refresh (
+            source TEXT PRIMARY KEY,
+            snapshot_date TEXT NOT NULL,  -- YYYY-MM-DD of the latest ingest
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Databases from before the table existed: the newest snapshot is the
+    # best known refresh date
+    cur.execute("""
+        INSERT OR IGNORE INTO source_refresh (source, snapshot_date)
+        SELECT source, MAX(snapshot_date) FROM workflow_metrics_history GROUP BY source
+    """)
     conn.commit()
     conn.close()
 
-def insert_results(source, results):
+def get_generation(conn):
+    """
+    Return the current data generation counter.
+    The counter increases every time insert_results commits, so readers can
+    use it to tell whether anything they cached is stale.
+    """
+    row = conn.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+def backfill_scores(cur):
+    """
+    Compute popularity_score for rows that were inserted without one.
+    """
+    rows = cur.execute(
+        "SELECT id, source, metrics_json FROM workflow_trends WHERE popularity_score IS NULL"
+    ).fetchall()
+    for row_id, source, metrics_json in rows:
+        score = score_metrics(source, json.loads(metrics_json))
+        cur.execute("UPDATE workflow_trends SET popularity_score = ? WHERE id = ?", (score, row_id))
+
+def backfill_natural_keys(cur):
+    """
+    Fill natural_key for rows inserted before the column existed.
+    Older rows carry no platform ID, so they are keyed by title or term (the
+    next run of their handler replaces them with ID-keyed rows). Older runs
+    could store the same workflow twice; only the newest row per
+    (source, natural_key) is kept so the unique index can be created.
+    """
+    cur.execute("UPDATE workflow_trends SET natural_key = COALESCE(workflow, term) WHERE natural_key IS NULL")
+    deleted = cur.execute("""
+        DELETE FROM workflow_trends
+        WHERE natural_key IS NOT NULL
+          AND id NOT IN (
+              SELECT MAX(id) FROM workflow_trends
+              WHERE natural_key IS NOT NULL
+              GROUP BY source, natural_key
+          )
+    """).rowcount
+    print(f"Natural key backfill: deleted {deleted} duplicate workflow_trends rows")
+
+def result_row(source, r):
+    """
+    Convert one handler result dict into a workflow_trends row tuple:
+    (natural_key, term, workflow, platform, metrics_json, popularity_score).
+    The natural key is the platform's stable ID (video_id / topic_id), so two
+    videos or topics with the same title stay separate rows; results without
+    one fall back to the workflow title, or the search term for Google Trends.
+    """
+    term = r.get("term")
+    workflow = r.get("workflow")
+    platform = r.get("platform")
+    raw_metrics = r.get("metrics") or r.get("popularity_metrics")
+    metrics = json.dumps(raw_metrics)
+    score = score_metrics(source, raw_metrics)
+    platform_id = r.get("video_id") or r.get("topic_id")
+    if platform_id is not None:
+        natural_key = str(platform_id)
+    else:
+        natural_key = workflow if workflow is not None else term
+    return (natural_key, term, workflow, platform, metrics, score)
+
+def record_snapshots(cur, source, rows, snapshot_date):
+    """
+    Append today's metrics to workflow_metrics_history.
+      - A snapshot is only written when the metrics differ from the workflow's
+        latest earlier snapshot, so unchanged workflows cost nothing.
+      - Re-running on the same day replaces that day's snapshot.
+    `rows` are the (source, natural_key, term, workflow, platform, metrics_json,
+    popularity_score) tuples built by insert_results.
+    """
+    cur.executemany(
+        "DELETE FROM workflow_metrics_history WHERE source = ? AND natural_key = ? AND snapshot_date = ?",
+        [(source, row[1], snapshot_date) for row in rows]
+    )
+    cur.executemany("""
+        INSERT INTO workflow_metrics_history (source, natural_key, snapshot_date, metrics_json, popularity_score)
+        SELECT ?1, ?2, ?3, ?4, ?5
+        WHERE ?4 IS NOT (
+            SELECT metrics_json FROM workflow_metrics_history
+            WHERE source = ?1 AND natural_key = ?2 AND snapshot_date < ?3
+            ORDER BY snapshot_date DESC
+            LIMIT 1
+        )
+    """, [(source, row[1], snapshot_date, row[5], row[6]) for row in rows])
+
+def compact_history(cur, source, today):
+    """
+    Keep the history table bounded:
+      - Drop snapshots older than HISTORY_RETENTION_DAYS.
+      - Past HISTORY_DAILY_DAYS, keep only the last snapshot of each week
+        per workflow.
+    With daily runs this caps each workflow at roughly
+    HISTORY_DAILY_DAYS + 52 snapshots.
+    """
+    retention_cutoff = (today - timedelta(days=HISTORY_RETENTION_DAYS)).isoformat()
+    daily_cutoff = (today - timedelta(days=HISTORY_DAILY_DAYS)).isoformat()
+    cur.execute(
+        "DELETE FROM workflow_metrics_history WHERE source = ? AND snapshot_date < ?",
+        (source, retention_cutoff)
+    )
+    cur.execute("""
+        DELETE FROM workflow_metrics_history AS h
+        WHERE h.source = ? AND h.snapshot_date < ?
+          AND EXISTS (
+              SELECT 1 FROM workflow_metrics_history AS later
+              WHERE later.source = h.source
+                AND later.natural_key = h.natural_key
+                AND later.snapshot_date > h.snapshot_date
+                AND later.snapshot_date < ?
+                AND strftime('%Y-%W', later.snapshot_date) = strftime('%Y-%W', h.snapshot_date)
+          )
+    """, (source, daily_cutoff, daily_cutoff))
+
+def insert_results(source, results, mode="upsert", snapshot_date=None, delete_missing=True):
     """
     Insert workflow trend results into the database.
     
     Behavior:
-      - Atomically replace all rows for a given source with new results.
-      - Uses a transaction to ensure either all rows are replaced or none on failure.
+      - mode="upsert" (default): rows are matched on the natural key
+        (source, platform ID or workflow/term; see result_row). New keys are inserted, keys missing from
+        `results` are deleted, and existing rows are only rewritten when their
+        metrics actually changed, so write volume scales with the change set.
+        With delete_missing=False, keys missing from `results` are kept
+        (for partial runs, e.g. when an API quota ran out).
+      - mode="replace": atomically replace all rows for a given source with new results.
+      - Uses a transaction to ensure either all rows are written or none on failure.
+      - Writes are batched with executemany.
+      - Scores each row with the source's scorer so the API can rank in SQL.
+      - Records the run's date as the source's latest refresh.
+      - Bumps the data generation counter in the same transaction when anything
+        changed, including the refresh date.
+      - Records a deduplicated metrics snapshot per workflow in
+        workflow_metrics_history and compacts old snapshots.
     
     Parameters:
       - source: str, the source of the data ("google", "youtube", "forum")
       - results: list of dicts, each dict contains:
           - term (optional): search term (for Google Trends)
           - workflow (optional): workflow title (for YouTube/forum)
+          - video_id / topic_id (optional): stable platform ID (for YouTube/forum)
           - platform (optional): platform name
           - metrics or popularity_metrics: dict of metrics (views, likes, etc.)
+      - mode: str, "upsert" or "replace"
+      - snapshot_date: datetime.date of the run for history (defaults to today)
+      - delete_missing: bool, whether an upsert deletes rows not in `results`
+
+    Returns:
+      - int: number of rows inserted, updated or deleted
     """
-    conn = sqlite3.connect(DB_PATH)
+    if mode not in ("upsert", "replace"):
+        raise ValueError(f"Unknown insert mode: {mode}")
+
+    # Later results win when two share a natural key
+    rows_by_key = {}
+    for r in results:
+        row = result_row(source, r)
+        if row[0] is None:
+            print(f"Skipping {source} result without a workflow or term: {r}")
+            continue
+        rows_by_key[row[0]] = row
+    rows = [(source,) + row for row in rows_by_key.values()]
+    snapshot_date = snapshot_date or date.today()
+
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_SECONDS)
     cur = conn.cursor()
     
     try:
         cur.execute("BEGIN")
-        
-        cur.execute("DELETE FROM workflow_trends WHERE source = ?", (source,))
-        
-        for r in results:
-            term = r.get("term")
-            workflow = r.get("workflow")
-            platform = r.get("platform")
-            metrics = json.dumps(r.get("metrics") or r.get("popularity_metrics"))
-            cur.execute("""
-                INSERT INTO workflow_trends (source, term, workflow, platform, metrics_json)
-                VALUES (?, ?, ?, ?, ?)
-            """, (source, term, workflow, platform, metrics))
+        changes_before = conn.total_changes
+
+        if mode == "replace":
+            cur.execute("DELETE FROM workflow_trends WHERE source = ?", (source,))
+            cur.executemany("""
+                INSERT INTO workflow_trends (source, natural_key, term, workflow, platform, metrics_json, popularity_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        else:
+            existing_keys = {
+                key for (key,) in cur.execute(
+                    "SELECT natural_key FROM workflow_trends WHERE source = ?", (source,)
+                )
+            }
+            stale_keys = existing_keys - rows_by_key.keys() if delete_missing else set()
+            cur.executemany(
+                "DELETE FROM workflow_trends WHERE source = ? AND natural_key IS ?",
+                [(source, key) for key in stale_keys]
+            )
+            cur.executemany("""
+                INSERT INTO workflow_trends (source, natural_key, term, workflow, platform, metrics_json, popularity_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, natural_key) DO UPDATE SET
+                    term = excluded.term,
+                    workflow = excluded.workflow,
+                    platform = excluded.platform,
+                    metrics_json = excluded.metrics_json,
+                    popularity_score = excluded.popularity_score
+                WHERE metrics_json IS NOT excluded.metrics_json
+                   OR platform IS NOT excluded.platform
+                   OR popularity_score IS NOT excluded.popularity_score
+                   OR workflow IS NOT excluded.workflow
+                   OR term IS NOT excluded.term
+            """, rows)
+
+        changed = conn.total_changes - changes_before
+        previous_refresh = cur.execute(
+            "SELECT snapshot_date FROM source_refresh WHERE source = ?", (source,)
+        ).fetchone()
+        cur.execute("""
+            INSERT INTO source_refresh (source, snapshot_date) VALUES (?, ?)
+            ON CONFLICT (source) DO UPDATE SET
+                snapshot_date = excluded.snapshot_date,
+                refreshed_at = CURRENT_TIMESTAMP
+        """, (source, snapshot_date.isoformat()))
+        if changed or previous_refresh != (snapshot_date.isoformat(),):
+            cur.execute("UPDATE data_generation SET generation = generation + 1 WHERE id = 1")
+
+        record_snapshots(cur, source, rows, snapshot_date.isoformat())
+        compact_history(cur, source, snapshot_date)
         
         conn.commit()
+        return changed
     except Exception:
         conn.rollback()
         raise
     finally:
         conn.close()
 
+
+def open_read_connection(db_path=DB_PATH):
+    """
+    Open a read-only connection tuned for serving API queries:
+      - mode=ro + query_only so a reader can never take a write lock
+      - mmap_size so pages are read straight from the OS page cache
+      - a larger page cache and in-memory temp storage for sorts
+    The connection may be shared across threads (one user at a time via the pool).
+    """
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=BUSY_TIMEOUT_SECONDS)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+class ReadConnectionPool:
+    """
+    Thread-safe, fixed-size pool of persistent read-only connections.
+    Borrow a connection with:
+
+        with pool.connection() as conn:
+            conn.execute(...)
+
+    Callers block until a connection is free, so at most `size` queries run at once.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=READ_POOL_SIZE):
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(open_read_connection(db_path))
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        """Close every pooled connection."""
+        while True:
+            try:
+                conn = self._connections.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
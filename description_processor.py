@@ -1,9 +1,61 @@
-import spacy
+import os
 import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+from importlib import metadata
+from integration_vocabulary import INTEGRATIONS, CASE_SENSITIVE_INTEGRATIONS
 
-# Load the large transformer-based English NLP model from spaCy.
+# The large transformer-based English NLP model from spaCy.
 # This model provides entity recognition for organizations, products, etc.
-nlp = spacy.load("en_core_web_trf")
+# It is loaded lazily on first use (see get_nlp), so importing this module
+# stays cheap and fully cached runs never load it at all.
+NLP_MODEL_NAME = "en_core_web_trf"
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+# Batch extraction settings for nlp.pipe.
+# Each extra process loads its own copy of the transformer, so cap it.
+NLP_BATCH_SIZE = 16
+NLP_N_PROCESS = min(4, os.cpu_count() or 1)
+
+# Entity labels treated as workflow/integration names
+ENTITY_LABELS = ("ORG", "PRODUCT")
+
+# Extraction mode:
+#   "transformer" - full en_core_web_trf NER (default)
+#   "fast"        - PhraseMatcher over integration_vocabulary, orders of
+#                   magnitude cheaper; with FAST_FALLBACK, texts it finds
+#                   nothing in (besides the caller's ignored terms) still go
+#                   through the transformer
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "transformer")
+FAST_FALLBACK = True
+
+_matcher = None
+
+# Streaming mode for long inputs (full articles, hour-long transcripts).
+# Texts longer than STREAM_WINDOW_CHARS are split into sentence-bounded
+# windows of at most that size and fed through the pipeline a few windows at
+# a time, so peak memory depends on the window size, not the input length.
+# This also keeps inputs under spaCy's max_length limit.
+STREAM_WINDOW_CHARS = 5000
+STREAM_BATCH_SIZE = 4
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+# Persistent cache of extraction results, keyed by a hash of the input text
+# plus the model name/version. Least recently used entries are evicted once
+# the cache holds more than NLP_CACHE_MAX_ENTRIES results.
+NLP_CACHE_PATH = "nlp_cache.db"
+NLP_CACHE_MAX_ENTRIES = 50000
+# Bump when clean_entities or ENTITY_LABELS change so old results are ignored
+NLP_CACHE_FORMAT = 1
+
+_cache_conn = None
+_cache_lock = threading.Lock()
 
 def clean_entities(entities):
     """
@@ -33,21 +85,400 @@ def clean_entities(entities):
                     keywords.append(part)
     return keywords
 
-def extract_search_terms(description):
+def get_nlp():
+    """
+    Return the shared spaCy pipeline, loading it on first use.
+    spaCy itself is only imported here, since importing it is slow.
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(NLP_MODEL_NAME)
+    return _nlp
+
+def __getattr__(name):
+    # Keep `description_processor.nlp` working for existing callers
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@lru_cache(maxsize=None)
+def model_version():
+    """
+    Installed version of the spaCy model package, read from package metadata
+    so cache keys can be built without loading the model.
+    """
+    try:
+        return metadata.version(NLP_MODEL_NAME)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+def get_cache_connection():
+    """
+    Open (once) the SQLite connection backing the extraction cache.
+    """
+    global _cache_conn
+    if _cache_conn is None:
+        _cache_conn = sqlite3.connect(NLP_CACHE_PATH, check_same_thread=False, timeout=30)
+        _cache_conn.execute("PRAGMA journal_mode=WAL")
+        _cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS entity_cache (
+                cache_key TEXT PRIMARY KEY,
+                terms_json TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        _cache_conn.execute("CREATE INDEX IF NOT EXISTS idx_entity_cache_last_used ON entity_cache (last_used)")
+        _cache_conn.commit()
+    return _cache_conn
+
+def cache_key(text):
+    """
+    Hash of the input text plus the model name and version (and cache format),
+    so upgrading the model or the cleaning rules never serves stale results.
+    """
+    model = f"{NLP_MODEL_NAME}-{model_version()}"
+    payload = f"{model}\0{NLP_CACHE_FORMAT}\0{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cache_lookup(keys):
+    """
+    Return {cache_key: terms} for the keys already in the cache and mark them
+    as recently used.
+    """
+    if not keys:
+        return {}
+    found = {}
+    with _cache_lock:
+        conn = get_cache_connection()
+        unique_keys = list(dict.fromkeys(keys))
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(unique_keys), 500):
+            chunk = unique_keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT cache_key, terms_json FROM entity_cache WHERE cache_key IN ({placeholders})",
+                chunk
+            ).fetchall()
+            found.update((key, json.loads(terms_json)) for key, terms_json in rows)
+        now = time.time()
+        conn.executemany(
+            "UPDATE entity_cache SET last_used = ? WHERE cache_key = ?",
+            [(now, key) for key in found]
+        )
+        conn.commit()
+    return found
+
+def cache_store(entries):
+    """
+    Save {cache_key: terms} results and evict least recently used entries
+    beyond NLP_CACHE_MAX_ENTRIES.
+    """
+    if not entries:
+        return
+    with _cache_lock:
+        conn = get_cache_connection()
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO entity_cache (cache_key, terms_json, last_used) VALUES (?, ?, ?)",
+            [(key, json.dumps(terms), now) for key, terms in entries.items()]
+        )
+        conn.execute("""
+            DELETE FROM entity_cache WHERE cache_key IN (
+                SELECT cache_key FROM entity_cache
+                ORDER BY last_used DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (NLP_CACHE_MAX_ENTRIES,))
+        conn.commit()
+
+def extract_search_terms(description, mode=None):
     """
     Processes a text description and extracts relevant search keywords.
 
     Steps:
-    1. Runs spaCy's NLP pipeline on the input text.
-    2. Extracts named entities that are either ORG (organizations) or PRODUCT.
+    1. In "transformer" mode, returns the cached result if this exact text was
+       processed before, otherwise runs spaCy's NLP pipeline on the input text
+       and extracts named entities that are either ORG (organizations) or PRODUCT.
+    2. In "fast" mode, matches the text against the known integration vocabulary
+       (see `extract_search_terms_fast`).
     3. Cleans and deduplicates entities using `clean_entities`.
 
     Args:
         description (str): The raw text (e.g., YouTube transcript, forum post).
+        mode (str): "transformer" or "fast"; defaults to EXTRACTION_MODE.
 
     Returns:
         list[str]: List of relevant, cleaned search terms for downstream searches.
     """
-    doc = nlp(description)
-    entities = [ent.text for ent in doc.ents if ent.label_ in ["ORG", "PRODUCT"]]
+    return extract_search_terms_batch([description], n_process=1, mode=mode)[0]
+
+def terms_from_doc(doc):
+    """
+    Pull ORG/PRODUCT entities out of a processed spaCy Doc and clean them.
+    """
+    entities = [ent.text for ent in doc.ents if ent.label_ in ENTITY_LABELS]
     return clean_entities(entities)
+
+def extract_search_terms_batch(descriptions, batch_size=NLP_BATCH_SIZE, n_process=NLP_N_PROCESS,
+                               mode=None, fallback=FAST_FALLBACK, ignore=()):
+    """
+    Batch version of `extract_search_terms`.
+
+    Steps:
+    1. "transformer" mode runs every text through `extract_search_terms_transformer`.
+    2. "fast" mode runs the vocabulary matcher; with `fallback`, texts where it
+       found nothing but `ignore`d terms are sent through the transformer path
+       instead (otherwise a text mentioning only "n8n" or "YouTube" would
+       count as matched, and the caller would then filter those out).
+
+    Args:
+        descriptions (list[str]): Raw texts (transcripts, forum posts, articles).
+        batch_size (int): Texts per batch sent through the pipeline.
+        n_process (int): Number of worker processes for the transformer.
+        mode (str): "transformer" or "fast"; defaults to EXTRACTION_MODE.
+        fallback (bool): In fast mode, use the transformer for unmatched texts.
+        ignore (iterable[str]): Terms the caller discards (case-insensitive);
+            matching only these counts as unmatched.
+
+    Returns:
+        list[list[str]]: Cleaned search terms for each input, in input order.
+    """
+    mode = mode or EXTRACTION_MODE
+    descriptions = list(descriptions)
+    if mode == "transformer":
+        return extract_search_terms_transformer(descriptions, batch_size, n_process)
+    if mode != "fast":
+        raise ValueError(f"Unknown extraction mode: {mode}")
+
+    results = extract_search_terms_fast(descriptions)
+    if fallback:
+        ignored = {term.lower() for term in ignore}
+        unmatched = [
+            i for i, terms in enumerate(results)
+            if all(term.lower() in ignored for term in terms)
+        ]
+        if unmatched:
+            fallback_terms = extract_search_terms_transformer(
+                [descriptions[i] for i in unmatched], batch_size, n_process
+            )
+            for i, terms in zip(unmatched, fallback_terms):
+                results[i] = terms
+    return results
+
+def extract_search_terms_transformer(descriptions, batch_size=NLP_BATCH_SIZE, n_process=NLP_N_PROCESS,
+                                     use_cache=True):
+    """
+    Extract terms with the transformer pipeline, built on `nlp.pipe`.
+
+    Steps:
+    1. Looks every text up in the extraction cache; only misses are processed.
+    2. Streams the uncached texts through spaCy in batches of `batch_size`.
+    3. Spreads batches over `n_process` worker processes on multi-core hosts.
+       Small inputs fall back to fewer processes, since starting a worker
+       (and loading the model in it) costs more than it saves.
+    4. Texts longer than STREAM_WINDOW_CHARS go through
+       `extract_search_terms_streaming` instead, one window batch at a time.
+    5. Extracts and cleans ORG/PRODUCT entities per text and caches them.
+
+    Args:
+        descriptions (list[str]): Raw texts (transcripts, forum posts, articles).
+        batch_size (int): Texts per batch sent through the pipeline.
+        n_process (int): Number of worker processes.
+        use_cache (bool): Read and write the extraction cache (benchmarks turn it off).
+
+    Returns:
+        list[list[str]]: Cleaned search terms for each input, in input order.
+    """
+    descriptions = list(descriptions)
+    keys = [cache_key(text) for text in descriptions]
+    results = cache_lookup(keys) if use_cache else {}
+
+    # Each distinct uncached text is processed once
+    misses = {key: text for key, text in zip(keys, descriptions) if key not in results}
+    if misses:
+        short = {key: text for key, text in misses.items() if len(text) <= STREAM_WINDOW_CHARS}
+        n_process = max(1, min(n_process, len(short) // batch_size))
+        docs = get_nlp().pipe(short.values(), batch_size=batch_size, n_process=n_process)
+        fresh = {key: terms_from_doc(doc) for key, doc in zip(short, docs)}
+        # Long texts are streamed window by window to keep memory bounded
+        for key, text in misses.items():
+            if key not in short:
+                fresh[key] = extract_search_terms_streaming(text)
+        if use_cache:
+            cache_store(fresh)
+        results.update(fresh)
+
+    return [results[key] for key in keys]
+
+def iter_text_windows(text, max_chars=STREAM_WINDOW_CHARS):
+    """
+    Lazily split text into windows of at most `max_chars` characters.
+
+    Steps:
+    1. Short texts are yielded unchanged as a single window.
+    2. Otherwise sentences (split on ., !, ? or blank lines) are packed into
+       windows up to `max_chars`.
+    3. A sentence longer than `max_chars` (e.g. unpunctuated page text or a
+       transcript) is cut on the last whitespace before the limit, so words
+       are never split.
+
+    Yields:
+        str: consecutive windows of the input text.
+    """
+    if len(text) <= max_chars:
+        yield text
+        return
+
+    window = ""
+    position = 0
+    for match in SENTENCE_END.finditer(text):
+        sentence = text[position:match.end()]
+        position = match.end()
+        if len(window) + len(sentence) <= max_chars:
+            window += sentence
+            continue
+        if window.strip():
+            yield window
+        window = ""
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            yield sentence[:cut]
+            sentence = sentence[cut:]
+        window = sentence
+    sentence = text[position:]
+    while len(window) + len(sentence) > max_chars:
+        room = max_chars - len(window)
+        cut = sentence.rfind(" ", 0, room)
+        cut = cut if cut > 0 else room
+        if window.strip() or sentence[:cut].strip():
+            yield window + sentence[:cut]
+        window = ""
+        sentence = sentence[cut:]
+    window += sentence
+    if window.strip():
+        yield window
+
+def extract_search_terms_streaming(text, window_chars=STREAM_WINDOW_CHARS, batch_size=STREAM_BATCH_SIZE):
+    """
+    Extract terms from an arbitrarily long text with bounded memory.
+
+    Steps:
+    1. Splits the text into windows with `iter_text_windows` (a generator).
+    2. Runs the windows through the transformer `batch_size` at a time.
+    3. Merges each window's terms into the result as it arrives, keeping the
+       first spelling of each term (same rules as `clean_entities`).
+
+    Args:
+        text (str): The raw text (full article, long transcript).
+        window_chars (int): Maximum characters per window.
+        batch_size (int): Windows processed together.
+
+    Returns:
+        list[str]: Cleaned, unique search terms for the whole text.
+    """
+    keywords = []
+    seen = set()
+    docs = get_nlp().pipe(iter_text_windows(text, window_chars), batch_size=batch_size)
+    for doc in docs:
+        for term in terms_from_doc(doc):
+            key = term.lower()
+            if key not in seen:
+                seen.add(key)
+                keywords.append(term)
+    return keywords
+
+def get_matcher():
+    """
+    Return the shared (tokenizer-only pipeline, PhraseMatcher, canonical names)
+    used by fast mode, building it on first use.
+
+    The pipeline is `spacy.blank("en")`: just a tokenizer, no model weights.
+    INTEGRATIONS are matched on lowercased tokens; CASE_SENSITIVE_INTEGRATIONS
+    only match their exact spelling (and see ambiguous_match).
+    """
+    global _matcher
+    if _matcher is None:
+        with _nlp_lock:
+            if _matcher is None:
+                import spacy
+                from spacy.matcher import PhraseMatcher
+
+                blank = spacy.blank("en")
+                lower_matcher = PhraseMatcher(blank.vocab, attr="LOWER")
+                exact_matcher = PhraseMatcher(blank.vocab, attr="ORTH")
+                canonical = {}
+                for name in INTEGRATIONS:
+                    lower_matcher.add(name, [blank.make_doc(name)])
+                    canonical[blank.vocab.strings[name]] = name
+                for name in CASE_SENSITIVE_INTEGRATIONS:
+                    exact_matcher.add(name, [blank.make_doc(name)])
+                    canonical[blank.vocab.strings[name]] = name
+                _matcher = (blank, (lower_matcher, exact_matcher), canonical)
+    return _matcher
+
+def is_title_case(doc):
+    """
+    True when most longer words in `doc` are capitalized, as in forum or
+    video titles ("Send Alerts To Signal"), where capitalization says
+    nothing about whether a word is a product name.
+    """
+    words = [token.text for token in doc if token.is_alpha and len(token.text) > 3]
+    return bool(words) and sum(word[0].isupper() for word in words) > len(words) / 2
+
+def ambiguous_match(span, title_case):
+    """
+    Whether a CASE_SENSITIVE_INTEGRATIONS match is more likely the everyday
+    word: at the start of a sentence, or anywhere in a Title Case text, the
+    capital letter does not mark a name.
+    """
+    if title_case or span.start == 0:
+        return True
+    previous = span.doc[span.start - 1]
+    return previous.text in (".", "!", "?", ":", '"', "“") or "\n" in previous.text
+
+def extract_search_terms_fast(descriptions):
+    """
+    Rule-based extraction over the integration vocabulary.
+
+    Steps:
+    1. Tokenizes each text with a blank English pipeline (no transformer),
+       streaming long texts in windows.
+    2. Finds every known integration name with PhraseMatchers.
+    3. Keeps the longest match where names overlap ("Google Sheets" over "Google"),
+       and drops case-sensitive names where their capital letter proves
+       nothing (see ambiguous_match).
+    4. Returns the canonical spellings, deduplicated. They bypass
+       `clean_entities`, whose length and "." rules would drop vocabulary
+       names such as "S3" or "Monday.com".
+
+    Args:
+        descriptions (list[str]): Raw texts.
+
+    Returns:
+        list[list[str]]: Matched integration names per input, in input order.
+    """
+    from spacy.util import filter_spans
+
+    blank, matchers, canonical = get_matcher()
+    names = [[] for _ in descriptions]
+    # Long texts are matched window by window (see iter_text_windows)
+    windows = (
+        (window, i)
+        for i, text in enumerate(descriptions)
+        for window in iter_text_windows(text)
+    )
+    lower_matcher, exact_matcher = matchers
+    for doc, i in blank.pipe(windows, batch_size=256, as_tuples=True):
+        title_case = is_title_case(doc)
+        spans = list(lower_matcher(doc, as_spans=True))
+        spans.extend(
+            span for span in exact_matcher(doc, as_spans=True)
+            if not ambiguous_match(span, title_case)
+        )
+        spans = sorted(filter_spans(spans), key=lambda span: span.start)
+        names[i].extend(canonical[span.label] for span in spans)
+    return [list(dict.fromkeys(found)) for found in names]
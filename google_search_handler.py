@@ -1,13 +1,17 @@
 import os
+import codecs
 import time
 import json
 import re
 import requests
 from collections import Counter
-from bs4 import BeautifulSoup
-from pytrends.request import TrendReq
-from description_processor import extract_search_terms
+from concurrent.futures import ThreadPoolExecutor
+import lxml.etree
+import lxml.html
+from description_processor import extract_search_terms_batch
 from db_handler import init_db, insert_results
+from http_utils import build_session
+from checkpoints import run_stage
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -20,6 +24,38 @@ MAX_SERP_CALLS = 3
 MAX_ARTICLES_PER_TERM = 1
 EXCLUDE_TERMS = {"n8n", "llm", "chatgpt", "youtube", "zapier", "github", "nadn"}
 
+# Article fetching: ARTICLE_WORKERS concurrent downloads over one pooled
+# session; bodies are streamed and cut off at ARTICLE_MAX_BYTES
+ARTICLE_WORKERS = 8
+ARTICLE_MAX_BYTES = 2 * 1024 * 1024
+ARTICLE_TIMEOUT_SECONDS = 10
+ARTICLE_CHUNK_BYTES = 64 * 1024
+# Elements that never hold article text
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "canvas", "iframe",
+                    "nav", "aside", "form", "button", "select")
+# Page headers/footers; inside <article>/<main> they hold the article's own
+# title, byline or notes, so only those outside are dropped
+PAGE_CHROME_TAGS = ("header", "footer")
+CONTENT_TAGS = ("article", "main")
+# class/id patterns of navigation, sidebars, cookie banners, share bars...
+BOILERPLATE_PATTERN = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|breadcrumbs?|sidebar|footer|header|cookie|consent|banner|"
+    r"share|social|related|recommended|comments?|newsletter|subscribe|promo|advert|ads?|popup|modal)($|[\s_-])",
+    re.IGNORECASE
+)
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+_article_session = None
+
+# Google Trends mode:
+#   "batched"  - TRENDS_BATCH_SIZE keywords per payload, each payload sharing
+#                TRENDS_ANCHOR so all terms can be rescaled onto one scale
+#   "per_term" - one payload per term (values are not comparable across terms)
+TRENDS_MODE = os.getenv("TRENDS_MODE", "batched")
+TRENDS_BATCH_SIZE = 5          # Trends' limit on keywords per payload
+TRENDS_ANCHOR = "n8n"
+# Directory to save each payload's raw dataframe (CSV) for offline replay
+TRENDS_RECORD_DIR = os.getenv("TRENDS_RECORD_DIR")
+
 def normalize_term(term):
     """
     Normalize search terms:
@@ -55,34 +91,127 @@ def serp_search(query, start=0):
     time.sleep(SLEEP_SECONDS)
     return urls
 
+def get_article_session():
+    """
+    Return the pooled session shared by the article fetchers.
+    """
+    global _article_session
+    if _article_session is None:
+        _article_session = build_session(pool_size=ARTICLE_WORKERS, headers={"User-Agent": "Mozilla/5.0"})
+    return _article_session
+
+def detect_encoding(html_bytes, declared=None):
+    """
+    Pick the charset to decode a page with: the one declared in the
+    Content-Type header, else a <meta charset> in the first bytes, else UTF-8.
+    """
+    if not declared:
+        match = META_CHARSET.search(html_bytes[:4096])
+        declared = match.group(1).decode("ascii") if match else None
+    try:
+        return codecs.lookup(declared).name if declared else "utf-8"
+    except LookupError:
+        return "utf-8"
+
+def html_to_text(html_bytes, encoding=None):
+    """
+    Extract the main-content text of an HTML page with lxml:
+      - Drop comments, scripts, styles, navigation and forms, and
+        headers/footers that are not inside <article>/<main>
+      - Use <article>, then <main> / role="main", then <body> as the content
+      - Inside it, drop elements whose class/id marks them as boilerplate,
+        unless they hold most of the content (wrappers like "has-comments")
+        or belong to the article's own header/footer
+      - Collapse whitespace
+    `encoding` is the charset from the Content-Type header, if any.
+    Returns the text, or an empty string for unparseable pages.
+    """
+    try:
+        parser = lxml.html.HTMLParser(encoding=detect_encoding(html_bytes, encoding))
+        root = lxml.html.document_fromstring(html_bytes, parser=parser)
+    except (ValueError, lxml.etree.ParserError):
+        return ""
+    for element in list(root.iter(lxml.etree.Comment, *BOILERPLATE_TAGS)):
+        if element.getparent() is not None:
+            element.drop_tree()
+    for element in list(root.iter(*PAGE_CHROME_TAGS)):
+        if not any(ancestor.tag in CONTENT_TAGS for ancestor in element.iterancestors()):
+            element.drop_tree()
+
+    content = root.find(".//article")
+    if content is None:
+        content = root.find(".//main")
+    if content is None:
+        candidates = root.xpath("//*[@role='main']")
+        content = candidates[0] if candidates else root.find(".//body")
+    if content is None:
+        content = root
+
+    content_length = len(content.text_content())
+    for element in content.xpath(".//*[@class or @id]"):
+        # Headers/footers left at this point belong to the article (e.g.
+        # WordPress's <header class="entry-header">), so the class rule
+        # must not drop them or anything inside them
+        if element.tag in PAGE_CHROME_TAGS or any(
+            ancestor.tag in PAGE_CHROME_TAGS for ancestor in element.iterancestors()
+        ):
+            continue
+        marker = f"{element.get('class', '')} {element.get('id', '')}"
+        if BOILERPLATE_PATTERN.search(marker) and len(element.text_content()) < content_length / 2:
+            element.drop_tree()
+    return re.sub(r"\s+", " ", content.text_content()).strip()
+
 def fetch_article_text(url):
     """
     Fetch article text from a URL.
+    The body is streamed and cut off at ARTICLE_MAX_BYTES; non-HTML
+    responses are skipped.
     Returns the plain text content or an empty string if failed.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        text = soup.get_text(separator=" ", strip=True)
-        return text
+        with get_article_session().get(url, timeout=ARTICLE_TIMEOUT_SECONDS, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type:
+                print(f"Skipping {url}: not HTML ({content_type})")
+                return ""
+            body = bytearray()
+            for chunk in response.iter_content(ARTICLE_CHUNK_BYTES):
+                body.extend(chunk)
+                if len(body) >= ARTICLE_MAX_BYTES:
+                    del body[ARTICLE_MAX_BYTES:]
+                    break
+        charset = response.encoding if "charset" in content_type.lower() else None
+        return html_to_text(bytes(body), charset)
     except Exception as e:
         print(f"Failed to fetch {url}: {e}")
         return ""
 
+def fetch_articles(urls):
+    """
+    Fetch several articles concurrently (ARTICLE_WORKERS at a time).
+    Returns their texts in the order of `urls` ("" for failures).
+    """
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(ARTICLE_WORKERS, len(urls))) as executor:
+        return list(executor.map(fetch_article_text, urls))
+
 def extract_terms_from_search(keyword):
     """
     Perform general search using SerpAPI and extract terms from articles.
     Steps:
       - Loop up to MAX_SERP_CALLS
       - Fetch URLs using serp_search
-      - Fetch article text and extract terms using NLP processor
+      - Fetch all article texts concurrently
+      - Extract terms from all articles in one NLP batch
       - Normalize and filter terms
       - Deduplicate terms preserving order
     Returns:
         List of unique extracted terms
     """
     all_terms = []
+    article_urls = []
     calls_made = 0
     start_index = 0
 
@@ -91,22 +220,127 @@ def extract_terms_from_search(keyword):
             urls = serp_search(keyword, start=start_index)
             if not urls:
                 break
-            for url in urls[:MAX_ARTICLES_PER_TERM]:
-                text = fetch_article_text(url)
-                if text:
-                    extracted = extract_search_terms(text)
-                    normalized = [normalize_term(t) for t in extracted if normalize_term(t) not in EXCLUDE_TERMS]
-                    all_terms.extend(normalized)
-                    time.sleep(SLEEP_SECONDS)
+            article_urls.extend(urls[:MAX_ARTICLES_PER_TERM])
             calls_made += 1
             start_index += 10
         except Exception as e:
-            print(f"Search or article fetch failed: {e}")
+            print(f"Search failed: {e}")
             break
 
+    texts = [text for text in fetch_articles(list(dict.fromkeys(article_urls))) if text]
+    for extracted in extract_search_terms_batch(texts, ignore=EXCLUDE_TERMS):
+        normalized = [normalize_term(t) for t in extracted if normalize_term(t) not in EXCLUDE_TERMS]
+        all_terms.extend(normalized)
+
     return list(dict.fromkeys(all_terms))
 
-def get_interest_over_time(pytrends, terms):
+def series_metrics(series):
+    """
+    Summarize an interest series:
+      - avg_interest and latest_interest
+      - trend direction ("up", "down", "stable") from first vs last value
+    """
+    trend_direction = "stable"
+    if len(series) >= 2:
+        first = series.iloc[0]
+        last = series.iloc[-1]
+        if last > first:
+            trend_direction = "up"
+        elif last < first:
+            trend_direction = "down"
+    return {
+        "avg_interest": float(series.mean()),
+        "latest_interest": float(series.iloc[-1]),
+        "trend": trend_direction
+    }
+
+def trend_batches(terms, anchor=TRENDS_ANCHOR, batch_size=TRENDS_BATCH_SIZE):
+    """
+    Split terms into payloads of `batch_size` keywords: the anchor plus up to
+    batch_size - 1 terms each. A term equal to the anchor is not repeated.
+    """
+    others = [t for t in dict.fromkeys(terms) if t.lower() != anchor.lower()]
+    step = batch_size - 1
+    return [[anchor] + others[i:i + step] for i in range(0, len(others), step)] or [[anchor]]
+
+def rescale_batches(frames, anchor=TRENDS_ANCHOR):
+    """
+    Put the interest series from several Trends payloads on one scale.
+    Each payload's values are relative to its own maximum (0-100), so the
+    same anchor term appears in every payload:
+      1. Scale each payload by the first payload's anchor total divided by its
+         own anchor total.
+      2. Renormalize so the highest value across all terms is 100, as in a
+         single Trends payload.
+    Payloads whose anchor has no interest cannot be placed on the scale and
+    are skipped.
+    `frames` are interest_over_time() dataframes (recorded ones work too).
+    Returns {term: series}, including the anchor.
+    """
+    scaled = {}
+    reference = None
+    for df in frames:
+        if df is None or df.empty or anchor not in df.columns:
+            continue
+        anchor_total = float(df[anchor].sum())
+        # Also catches NaN, which would poison every factor after it
+        if not anchor_total > 0:
+            terms = [c for c in df.columns if c not in (anchor, "isPartial")]
+            print(f"Anchor '{anchor}' has no interest in payload {terms}; skipping it")
+            continue
+        if reference is None:
+            reference = anchor_total
+        factor = reference / anchor_total
+        for column in df.columns:
+            if column == "isPartial" or (column == anchor and anchor in scaled):
+                continue
+            scaled[column] = df[column].astype(float) * factor
+
+    peak = max((float(series.max()) for series in scaled.values()), default=0.0)
+    if peak > 0:
+        scaled = {term: series * (100.0 / peak) for term, series in scaled.items()}
+    return scaled
+
+def record_trends_frame(df, terms):
+    """
+    Save a payload's raw dataframe to TRENDS_RECORD_DIR, if set, so the
+    batching and rescaling can be replayed offline.
+    """
+    if not TRENDS_RECORD_DIR:
+        return
+    os.makedirs(TRENDS_RECORD_DIR, exist_ok=True)
+    name = re.sub(r"[^A-Za-z0-9]+", "_", "-".join(terms)).strip("_")[:100]
+    df.to_csv(os.path.join(TRENDS_RECORD_DIR, f"{int(time.time())}_{name}.csv"))
+
+def get_interest_batched(pytrends, terms):
+    """
+    Fetch Google Trends interest with TRENDS_BATCH_SIZE keywords per payload
+    (see trend_batches) and rescale all payloads onto the anchor's scale
+    (see rescale_batches), so metrics are comparable across terms.
+    A failed payload only loses its own terms.
+    Returns:
+        Dictionary mapping term -> metrics
+    """
+    frames = []
+    for batch in trend_batches(terms):
+        try:
+            pytrends.build_payload(batch, cat=0, timeframe=TIMEFRAME, geo="US")
+            df = pytrends.interest_over_time()
+            record_trends_frame(df, batch)
+            frames.append(df)
+        except Exception as e:
+            print(f"Failed to fetch interest for {batch[1:]}: {e}")
+        time.sleep(SLEEP_SECONDS)
+
+    scaled = rescale_batches(frames)
+    interest_data = {}
+    for term in terms:
+        key = TRENDS_ANCHOR if term.lower() == TRENDS_ANCHOR.lower() else term
+        if key in scaled:
+            interest_data[term] = series_metrics(scaled[key])
+    return interest_data
+
+def get_interest_per_term(pytrends, terms):
     """
     Fetch Google Trends interest data for a list of terms.
     For each term:
@@ -124,28 +358,25 @@ def get_interest_over_time(pytrends, terms):
             df = pytrends.interest_over_time()
             if df.empty:
                 continue
-            series = df[term]
-            trend_direction = "stable"
-            if len(series) >= 2:
-                first = series.iloc[0]
-                last = series.iloc[-1]
-                if last > first:
-                    trend_direction = "up"
-                elif last < first:
-                    trend_direction = "down"
-            interest_data[term] = {
-                "avg_interest": float(series.mean()),
-                "latest_interest": float(series.iloc[-1]),
-                "trend": trend_direction
-            }
+            interest_data[term] = series_metrics(df[term])
             time.sleep(SLEEP_SECONDS)
         except Exception as e:
             print(f"Failed to fetch interest for {term}: {e}")
     return interest_data
 
+def get_interest_over_time(pytrends, terms):
+    """
+    Fetch Google Trends metrics for terms using the configured TRENDS_MODE.
+    Returns:
+        Dictionary mapping term -> metrics
+    """
+    if TRENDS_MODE == "per_term":
+        return get_interest_per_term(pytrends, terms)
+    return get_interest_batched(pytrends, terms)
+
 def main():
     """
-    Main function:
+    Main function (each stage is checkpointed; see checkpoints.run_stage):
       - Initialize database
       - Extract search terms from general SerpAPI search
       - Fetch Google Trends metrics for terms
@@ -154,14 +385,20 @@ def main():
     """
     init_db()
     print(f"Performing general search via SerpAPI for '{BASE_KEYWORD}'...")
-    extracted_terms = extract_terms_from_search(BASE_KEYWORD)
+    extracted_terms = run_stage("google", "extracted_terms", extract_terms_from_search, BASE_KEYWORD)
 
     term_counts = Counter(extracted_terms)
     top_terms = term_counts
 
     print("Fetching Google Trends metrics for extracted terms...")
-    pytrends = TrendReq(hl="en-US", tz=360)
-    interest_data = get_interest_over_time(pytrends, top_terms)
+
+    def fetch_interest():
+        # Imported here: pytrends pulls in pandas, which is slow to import
+        from pytrends.request import TrendReq
+        pytrends = TrendReq(hl="en-US", tz=360)
+        return get_interest_over_time(pytrends, top_terms)
+
+    interest_data = run_stage("google", "interest_data", fetch_interest)
 
     results = []
     for term in top_terms:
@@ -174,7 +411,7 @@ def main():
             })
         })
 
-    insert_results("google", results)
+    run_stage("google", "inserted", insert_results, "google", results)
     print("Google search results inserted into database.")
     return results
 
@@ -0,0 +1,107 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_RETRIES = 4
+# Backoff for 429/5xx responses without a Retry-After header
+BACKOFF_SECONDS = 2.0
+MAX_RETRY_AFTER_SECONDS = 120
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter shared by all workers of a crawler.
+    Allows `rate` requests per second on average with bursts of up to
+    `capacity`. `pause(seconds)` empties the bucket and blocks every caller
+    for that long, which is how a server's Retry-After is honoured.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+def build_session(pool_size=DEFAULT_POOL_SIZE, headers=None):
+    """
+    Return a requests.Session whose connection pool can serve `pool_size`
+    concurrent workers, so TCP/TLS connections are reused between requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def retry_after_seconds(response, attempt):
+    """
+    Seconds to wait before retrying `response`: its Retry-After header
+    (seconds or HTTP date) when present, otherwise exponential backoff.
+    """
+    value = response.headers.get("Retry-After")
+    if value:
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+    return BACKOFF_SECONDS * (2 ** attempt)
+
+
+def rate_limited_get(session, bucket, url, params=None, headers=None, max_retries=MAX_RETRIES):
+    """
+    GET `url` through the shared token bucket.
+    Steps:
+      1. Take a token from `bucket` before every attempt.
+      2. On 429 or a transient 5xx, pause the whole bucket for Retry-After
+         (or a backoff) so every worker slows down, then retry.
+      3. Raise for any other error status, or once retries run out.
+    Returns the response.
+    """
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        response = session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+        if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+            response.raise_for_status()
+            return response
+        wait = retry_after_seconds(response, attempt)
+        print(f"HTTP {response.status_code} from {url}, retrying in {wait:.1f}s")
+        bucket.pause(wait)
@@ -0,0 +1,61 @@
+# Known integration / product names used by the "fast" extraction mode in
+# description_processor. Names in INTEGRATIONS match case-insensitively on
+# whole tokens, so list each once in its canonical spelling; the canonical
+# spelling is what gets returned. Add new integrations here as they show up
+# in results.
+INTEGRATIONS = (
+    # Google
+    "Google Sheets", "Google Drive", "Google Docs", "Google Calendar", "Google Analytics",
+    "Google Ads", "Google Forms", "Google Cloud", "Google Gemini", "Gemini", "Gmail",
+    "BigQuery", "Firebase", "Google Maps", "Google Search Console", "Google Business Profile",
+    "Google Slides", "Google Tasks", "Google Contacts", "Google Translate",
+    "Google Cloud Storage",
+    # Microsoft
+    "Microsoft Teams", "Microsoft Excel", "Excel", "Outlook", "Microsoft Outlook",
+    "OneDrive", "SharePoint", "Microsoft To Do", "Azure", "Azure OpenAI", "Power BI",
+    "Dynamics 365", "Power Automate",
+    # Messaging & communication
+    "Slack", "Discord", "Telegram", "WhatsApp", "WhatsApp Business", "Twilio",
+    "Mattermost", "SendGrid", "Mailchimp", "Mailgun", "Brevo", "ConvertKit",
+    "ActiveCampaign", "Postmark", "Intercom", "Zendesk", "Freshdesk", "Help Scout",
+    "Vonage",
+    # Productivity & project management
+    "Notion", "Airtable", "Trello", "Asana", "Jira", "ClickUp", "Monday.com", "Todoist",
+    "Confluence", "Evernote", "Baserow", "NocoDB", "SeaTable", "Smartsheet",
+    "Calendly", "Cal.com", "Typeform", "Jotform",
+    # CRM & sales
+    "HubSpot", "Salesforce", "Pipedrive", "Zoho CRM", "Zoho", "LinkedIn", "Lemlist",
+    "Clearbit", "Odoo", "GoHighLevel", "Keap", "Attio",
+    # Commerce & payments
+    "Shopify", "WooCommerce", "Stripe", "PayPal", "Gumroad", "Paddle", "Chargebee",
+    "QuickBooks", "Xero", "Magento", "BigCommerce",
+    # Social & content
+    "Twitter", "Facebook", "Facebook Lead Ads", "Instagram", "TikTok", "YouTube",
+    "Reddit", "Pinterest", "Bluesky", "WordPress", "Webflow", "Contentful", "Strapi",
+    "RSS",
+    # Developer tools & infrastructure
+    "GitHub", "GitLab", "Bitbucket", "Docker", "Kubernetes", "AWS", "AWS Lambda",
+    "Amazon S3", "S3", "DigitalOcean", "Cloudflare", "Vercel", "Netlify", "Heroku",
+    "Supabase", "Postgres", "PostgreSQL", "MySQL", "MongoDB", "Redis", "SQLite",
+    "Elasticsearch", "Snowflake", "Kafka", "RabbitMQ", "GraphQL", "Webhook", "Webhooks",
+    "HTTP Request", "Sentry", "Grafana", "Datadog", "PagerDuty", "Jenkins",
+    "Dropbox", "FTP", "SFTP", "Nextcloud",
+    # AI & LLM tooling
+    "OpenAI", "ChatGPT", "GPT-4", "GPT-4o", "Anthropic", "Mistral", "Ollama",
+    "Hugging Face", "LangChain", "Pinecone", "Qdrant", "Weaviate", "Perplexity",
+    "Perplexity AI", "ElevenLabs", "DeepSeek", "Groq", "OpenRouter", "Midjourney",
+    "Stable Diffusion", "DALL-E", "Apify", "Firecrawl", "ScrapeNinja", "Browserless",
+    "Puppeteer", "Playwright", "SerpAPI", "Vapi", "Retell AI", "Supadata",
+    # Automation platforms
+    "n8n", "Zapier", "Integromat", "IFTTT", "Pabbly", "Pipedream",
+)
+
+# Names that are also everyday English words ("box", "wave"...).
+# These only match when written exactly as listed, mid-sentence and outside
+# Title Case text, to avoid false positives. Names that are mostly everyday
+# words even then ("Make", "Close", "Linear", "Medium") are left out.
+CASE_SENSITIVE_INTEGRATIONS = (
+    "Box", "Wave", "Square", "Hunter", "Signal", "Threads",
+    "Meta", "Apollo", "Copper", "Ghost", "Tally", "Coda", "Claude", "Whisper",
+    "Amazon", "Zoom", "Crisp", "Replicate", "Instantly", "Basecamp",
+)
@@ -1,6 +1,13 @@
+import os
 import sys
+import time
+import argparse
 import traceback
 import importlib
+import multiprocessing
+from multiprocessing.connection import wait
+from db_handler import init_db
+from checkpoints import RESUME_ENV, latest_run_id, new_run_id, start_run
 
 # 3 sources
 SCRIPTS = [
@@ -9,23 +16,193 @@ SCRIPTS = [
     "n8n_forum_handler"
 ]
 
+# Wall-clock limit per attempt, in seconds; the worker is killed after it
+HANDLER_TIMEOUTS = {
+    "google_search_handler": 30 * 60,
+    "youtube_handler": 3 * 60 * 60,
+    "n8n_forum_handler": 30 * 60,
+}
+DEFAULT_TIMEOUT_SECONDS = 60 * 60
+# Attempts per handler (1 = no retries)
+MAX_ATTEMPTS = 2
+RETRY_DELAY_SECONDS = 60
+
 def run_script(script_name):
-    #Load and run a script to populate n8n workflow popularity data from a specific source
+    """
+    Load and run a script to populate n8n workflow popularity data from a specific source.
+    Returns the number of records inserted; exceptions propagate to the caller.
+    """
+    module = importlib.import_module(script_name)
+    print(f"\n=== Running {script_name} ===")
+    result = module.main()
+    print(f"{script_name} completed. Inserted {len(result)} records.\n")
+    return len(result)
+
+def handler_process(script_name, conn, resume=False):
+    """
+    Worker process entry point: run one handler and report
+    ("ok", record count) or ("error", message) back over `conn`; the
+    traceback goes to the worker's stderr.
+    With `resume`, stages already checkpointed in this run are skipped.
+    """
+    if resume:
+        os.environ[RESUME_ENV] = "1"
     try:
-        module = importlib.import_module(script_name)
-        print(f"\n=== Running {script_name} ===")
-        result = module.main()
-        print(f"{script_name} completed. Inserted {len(result)} records.\n")
-    except Exception as e:
-        print(f"Error in {script_name}: {e}")
+        conn.send(("ok", run_script(script_name)))
+    except BaseException as e:
         traceback.print_exc()
-        sys.exit(1)
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
 
-def main():
-    # Main Entry Point
-    for script in SCRIPTS:
-        run_script(script)
+def start_attempt(context, script_name, attempt):
+    """
+    Start a worker process for one attempt of a handler.
+    Returns the bookkeeping dict the orchestrator polls.
+    """
+    receiver, sender = context.Pipe(duplex=False)
+    # Retries pick up from the stages the failed attempt completed
+    process = context.Process(target=handler_process, args=(script_name, sender, attempt > 1), name=script_name)
+    process.start()
+    sender.close()
+    timeout = HANDLER_TIMEOUTS.get(script_name, DEFAULT_TIMEOUT_SECONDS)
+    return {
+        "script": script_name,
+        "attempt": attempt,
+        "process": process,
+        "conn": receiver,
+        "deadline": time.monotonic() + timeout,
+        "timeout": timeout,
+    }
+
+def finish_attempt(run, timed_out):
+    """
+    Collect the outcome of a finished worker, or kill a timed-out one.
+    Returns (status, detail) with status "ok", "error" or "timeout".
+    """
+    process = run["process"]
+    if timed_out:
+        process.terminate()
+        process.join(10)
+        if process.is_alive():
+            process.kill()
+        process.join()
+        outcome = ("timeout", f"no result after {run['timeout']}s")
+    else:
+        process.join()
+        try:
+            outcome = run["conn"].recv() if run["conn"].poll() else None
+        except EOFError:
+            outcome = None
+        if outcome is None:
+            outcome = ("error", f"worker exited with code {process.exitcode}")
+    run["conn"].close()
+    return outcome
+
+def run_parallel(scripts):
+    """
+    Run every handler in its own worker process, all at once.
+    Steps:
+      1. Start one spawned process per handler, so Whisper, spaCy and the
+         crawlers do not share a GIL or a crashed interpreter.
+      2. Wait on the process sentinels; a process past its deadline is killed.
+      3. Failed or timed-out handlers are restarted after RETRY_DELAY_SECONDS,
+         up to MAX_ATTEMPTS, resuming from their checkpointed stages; the
+         other handlers keep running meanwhile.
+    Returns {script: (status, detail, attempts, seconds)}.
+    """
+    context = multiprocessing.get_context("spawn")
+    started = {script: time.monotonic() for script in scripts}
+    running = [start_attempt(context, script, 1) for script in scripts]
+    retries = []        # (start time, script, attempt)
+    results = {}
+
+    while running or retries:
+        now = time.monotonic()
+        for retry in [r for r in retries if r[0] <= now]:
+            retries.remove(retry)
+            running.append(start_attempt(context, retry[1], retry[2]))
+
+        deadlines = [run["deadline"] for run in running] + [r[0] for r in retries]
+        wait_seconds = max(0.0, min(deadlines) - time.monotonic())
+        ready = wait([run["process"].sentinel for run in running], timeout=wait_seconds)
+
+        now = time.monotonic()
+        for run in list(running):
+            finished = run["process"].sentinel in ready
+            if not finished and now < run["deadline"]:
+                continue
+            running.remove(run)
+            status, detail = finish_attempt(run, timed_out=not finished)
+            script, attempt = run["script"], run["attempt"]
+            if status != "ok" and attempt < MAX_ATTEMPTS:
+                print(f"{script} attempt {attempt} failed ({status}: {detail}); "
+                      f"retrying in {RETRY_DELAY_SECONDS}s")
+                retries.append((now + RETRY_DELAY_SECONDS, script, attempt + 1))
+                continue
+            results[script] = (status, detail, attempt, now - started[script])
+    return results
+
+def run_serial(scripts):
+    """
+    Run the handlers one after another in this process, without retries.
+    A failing handler no longer stops the ones after it.
+    Returns {script: (status, detail, attempts, seconds)}.
+    """
+    results = {}
+    for script in scripts:
+        start = time.monotonic()
+        try:
+            results[script] = ("ok", run_script(script), 1, time.monotonic() - start)
+        except Exception as e:
+            print(f"Error in {script}: {e}")
+            traceback.print_exc()
+            results[script] = ("error", f"{type(e).__name__}: {e}", 1, time.monotonic() - start)
+    return results
+
+def print_summary(results, elapsed):
+    """
+    Print one line per handler and return the process exit code
+    (0 if every handler succeeded, 1 otherwise).
+    """
+    print("\n=== Summary ===")
+    for script, (status, detail, attempts, seconds) in results.items():
+        outcome = f"{detail} records" if status == "ok" else detail
+        print(f"{script:<24}{status:<9}{seconds:>8.1f}s  attempts={attempts}  {outcome}")
+    failed = [script for script, result in results.items() if result[0] != "ok"]
+    print(f"Total wall-clock time: {elapsed:.1f}s")
+    if failed:
+        print(f"\nFailed: {', '.join(failed)}")
+        return 1
     print("\nAll scripts completed successfully.")
+    return 0
+
+def main(argv=None):
+    # Main Entry Point
+    parser = argparse.ArgumentParser(description="Collect n8n workflow popularity data from all sources.")
+    parser.add_argument("--serial", action="store_true",
+                        help="run the handlers one after another in this process")
+    parser.add_argument("--only", nargs="+", choices=SCRIPTS, metavar="HANDLER",
+                        help=f"run only these handlers ({', '.join(SCRIPTS)})")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the latest run (or --run-id), skipping stages with valid checkpoints")
+    parser.add_argument("--run-id", help="run ID to resume, or to use for a new run")
+    args = parser.parse_args(argv)
+    scripts = args.only or SCRIPTS
+
+    run_id = args.run_id or (latest_run_id() if args.resume else None)
+    if args.resume and run_id is None:
+        print("No previous run to resume; starting a new run.")
+    resume = args.resume and run_id is not None
+    run_id = run_id or new_run_id()
+    start_run(run_id, resume=resume)
+    print(f"{'Resuming' if resume else 'Starting'} run {run_id}")
+
+    # Create/migrate the schema once, before several processes write to it
+    init_db()
+    start = time.monotonic()
+    results = run_serial(scripts) if args.serial else run_parallel(scripts)
+    return print_summary(results, time.monotonic() - start)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
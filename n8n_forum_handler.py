@@ -1,24 +1,71 @@
 import os
-import requests
 import json
 import re
-import time
+import sqlite3
+import threading
+import zlib
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
 from dotenv import load_dotenv
-from description_processor import extract_search_terms
+from description_processor import extract_search_terms_batch
 from db_handler import init_db, insert_results
+from http_utils import TokenBucket, build_session, rate_limited_get
+from checkpoints import run_stage
 
 load_dotenv()
 
 # CONSTANTS
-DISCOURSE_BASE_URL = "https://community.n8n.io"
+# Overridable so the crawler can be pointed at a local stub server
+DISCOURSE_BASE_URL = os.getenv("DISCOURSE_BASE_URL", "https://community.n8n.io")
 CATEGORY_ID = 15
 
 #Dev-Safe Results Cap
 MAX_RESULTS_GENERAL = 10 
 MAX_RESULTS_SPECIFIC = 10
 MAX_TERMS = 20
-THROTTLE_SECONDS = 2
+
+# Category listing: Discourse "top" period (all, yearly, quarterly, monthly,
+# weekly, daily; None uses the site default) and how many pages to follow
+TOP_PERIOD = os.getenv("FORUM_TOP_PERIOD")
+MAX_CATEGORY_PAGES = 5
+# Listed topics are processed (details fetched) in batches of this size as
+# pages stream in
+TOPIC_BATCH_SIZE = 30
+
+# Crawler: FORUM_WORKERS threads share one connection pool and one token
+# bucket, so throughput is set by the allowed request rate. Discourse
+# answers 429 with Retry-After when it is exceeded; the bucket then pauses.
+FORUM_WORKERS = 8
+REQUESTS_PER_SECOND = 3
+REQUEST_BURST = 6
+
+_session = None
+_bucket = None
+_http_lock = threading.Lock()
+
+# Topic details are cached in FORUM_CACHE_PATH between runs and revalidated
+# with ETag / If-Modified-Since; within a run each topic is requested at most
+# once (_topic_memo), however many crawl phases ask for it.
+FORUM_CACHE_PATH = "forum_cache.db"
+_forum_cache_conn = None
+_forum_cache_lock = threading.Lock()
+_topic_memo = {}
+_topic_memo_lock = threading.Lock()
+# Updated from the crawler threads; use count_topic_stat
+topic_cache_stats = Counter()
+_topic_stats_lock = threading.Lock()
+
+# Crawl mode:
+#   "incremental" - compare each topic's listing metadata (bumped_at,
+#                   last_posted_at, posts_count) with the watermark stored on
+#                   the last run; only changed topics are fetched, the rest
+#                   keep their stored metrics
+#   "full"        - fetch details for every topic
+CRAWL_MODE = os.getenv("FORUM_CRAWL_MODE", "incremental")
+# Views change without bumping a topic, so carried-forward metrics are
+# refreshed once they are this old
+WATERMARK_MAX_AGE_DAYS = 7
 
 # Terms to exclude on specific search topics
 EXCLUDE_TERMS = {"n8n", "llm", "chatgpt", "youtube", "zapier", "github", "nadn"}
@@ -36,67 +83,295 @@ def normalize_term(term):
     return term_clean.title()
 
 
-def fetch_category_topics():
+def get_http():
     """
-    Fetch top topics from the "built-with-n8n" category of the forum.
-    Returns a list of topic metadata in JSON.
+    Return the shared (session, token bucket) pair used for every forum
+    request, creating them on first use.
     """
-    url = f"{DISCOURSE_BASE_URL}/c/built-with-n8n/{CATEGORY_ID}/l/top.json"
-    response = requests.get(url)
-    response.raise_for_status()
-    time.sleep(THROTTLE_SECONDS)
-    data = response.json()
-    return data.get("topic_list", {}).get("topics", [])
-
+    global _session, _bucket
+    with _http_lock:
+        if _session is None:
+            _session = build_session(pool_size=FORUM_WORKERS, headers={"Accept": "application/json"})
+            _bucket = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+        return _session, _bucket
+
+def forum_get(path, params=None):
+    """GET a forum JSON endpoint through the shared pool and rate limiter."""
+    session, bucket = get_http()
+    return rate_limited_get(session, bucket, f"{DISCOURSE_BASE_URL}{path}", params=params).json()
+
+def fetch_category_topics(period=None, max_pages=None, max_topics=None):
+    """
+    Stream top topics from the "built-with-n8n" category of the forum.
+    Pages are requested lazily, following the listing's more_topics_url
+    (page=N), so a consumer that stops early never requests later pages.
+    Stops after `max_pages` pages, after `max_topics` topics, or when the
+    listing has no more pages.
+    Yields topic metadata dicts.
+    """
+    period = period or TOP_PERIOD
+    max_pages = max_pages or MAX_CATEGORY_PAGES
+    page = 0
+    yielded = 0
+    for _ in range(max_pages):
+        params = {"page": page} if page else {}
+        if period:
+            params["period"] = period
+        data = forum_get(f"/c/built-with-n8n/{CATEGORY_ID}/l/top.json", params=params or None)
+        topic_list = data.get("topic_list", {})
+        topics = topic_list.get("topics", [])
+        for topic in topics:
+            yield topic
+            yielded += 1
+            if max_topics and yielded >= max_topics:
+                return
+
+        more_url = topic_list.get("more_topics_url")
+        if not topics or not more_url:
+            return
+        next_page = parse_qs(urlparse(more_url).query).get("page", [None])[0]
+        page = int(next_page) if next_page and next_page.isdigit() else page + 1
+
+
+def get_forum_cache_connection():
+    """
+    Open (once) the SQLite connection backing the topic-detail cache.
+    """
+    global _forum_cache_conn
+    if _forum_cache_conn is None:
+        _forum_cache_conn = sqlite3.connect(FORUM_CACHE_PATH, check_same_thread=False, timeout=30)
+        _forum_cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS topic_details (
+                topic_id INTEGER PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                payload BLOB NOT NULL,         -- zlib-compressed JSON
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        _forum_cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS topic_watermarks (
+                topic_id INTEGER PRIMARY KEY,
+                bumped_at TEXT,
+                last_posted_at TEXT,
+                posts_count INTEGER,
+                metrics_json TEXT NOT NULL,
+                checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        _forum_cache_conn.commit()
+    return _forum_cache_conn
+
+def load_cached_topic(topic_id):
+    """
+    Return (etag, last_modified, details) stored for a topic, or None.
+    """
+    with _forum_cache_lock:
+        row = get_forum_cache_connection().execute(
+            "SELECT etag, last_modified, payload FROM topic_details WHERE topic_id = ?", (topic_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    return row[0], row[1], json.loads(zlib.decompress(row[2]))
+
+def save_cached_topic(topic_id, etag, last_modified, payload):
+    """
+    Store a topic's raw JSON body with the validators it was served with.
+    """
+    with _forum_cache_lock:
+        conn = get_forum_cache_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO topic_details (topic_id, etag, last_modified, payload) VALUES (?, ?, ?, ?)",
+            (topic_id, etag, last_modified, zlib.compress(payload))
+        )
+        conn.commit()
 
 def fetch_topic_details(topic_id):
     """
     Fetch detailed information for a single forum topic by ID.
     Includes posts, views, replies, likes, and authors.
+    Steps:
+      1. Return the copy already fetched this run, if any.
+      2. Otherwise revalidate the cached copy with If-None-Match /
+         If-Modified-Since; a 304 reuses it without downloading the topic.
+      3. Store new or changed topics in the cache.
+    """
+    with _topic_memo_lock:
+        if topic_id in _topic_memo:
+            count_topic_stat("memo")
+            return _topic_memo[topic_id]
+
+    cached = load_cached_topic(topic_id)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    session, bucket = get_http()
+    response = rate_limited_get(session, bucket, f"{DISCOURSE_BASE_URL}/t/{topic_id}.json", headers=headers)
+    if response.status_code == 304 and cached:
+        details = cached[2]
+        count_topic_stat("not_modified")
+    else:
+        details = response.json()
+        save_cached_topic(topic_id, response.headers.get("ETag"), response.headers.get("Last-Modified"), response.content)
+        count_topic_stat("downloaded")
+
+    with _topic_memo_lock:
+        _topic_memo[topic_id] = details
+    return details
+
+def count_topic_stat(name):
+    """Increment a topic_cache_stats counter (Counter updates are not atomic)."""
+    with _topic_stats_lock:
+        topic_cache_stats[name] += 1
+
+def listing_watermark(topic):
+    """
+    Return the (bumped_at, last_posted_at, posts_count) a topic listing or
+    search result reports, which change whenever the topic gets activity.
+    """
+    return (topic.get("bumped_at"), topic.get("last_posted_at"), topic.get("posts_count"))
+
+def load_watermarks(topic_ids):
+    """
+    Return {topic_id: (watermark, metrics, age_days)} for topics seen on
+    earlier runs.
+    """
+    stored = {}
+    with _forum_cache_lock:
+        conn = get_forum_cache_connection()
+        for start in range(0, len(topic_ids), 500):
+            chunk = topic_ids[start:start + 500]
+            rows = conn.execute(f"""
+                SELECT topic_id, bumped_at, last_posted_at, posts_count, metrics_json,
+                       julianday('now') - julianday(checked_at)
+                FROM topic_watermarks WHERE topic_id IN ({",".join("?" * len(chunk))})
+            """, chunk).fetchall()
+            for topic_id, bumped_at, last_posted_at, posts_count, metrics_json, age_days in rows:
+                stored[topic_id] = ((bumped_at, last_posted_at, posts_count), json.loads(metrics_json), age_days)
+    return stored
+
+def save_watermarks(entries):
+    """
+    Store (topic_id, watermark, metrics) for topics whose details were just fetched.
+    """
+    if not entries:
+        return
+    with _forum_cache_lock:
+        conn = get_forum_cache_connection()
+        conn.executemany("""
+            INSERT OR REPLACE INTO topic_watermarks
+                (topic_id, bumped_at, last_posted_at, posts_count, metrics_json, checked_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, [(topic_id, *watermark, json.dumps(metrics)) for topic_id, watermark, metrics in entries])
+        conn.commit()
+
+def fetch_topics_details(topic_ids):
+    """
+    Fetch details for many topics concurrently (FORUM_WORKERS threads,
+    paced by the shared token bucket).
+    Returns {topic_id: details}, with None for topics that failed.
+    """
+    def fetch(topic_id):
+        try:
+            return fetch_topic_details(topic_id)
+        except Exception as e:
+            print(f"Failed to fetch topic details for {topic_id}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=FORUM_WORKERS) as executor:
+        return dict(zip(topic_ids, executor.map(fetch, topic_ids)))
+
+def topic_metrics(details):
+    """
+    Extract engagement metrics from a topic's details:
+    views, reply_count, like_count and unique contributors.
+    Missing details count as zero engagement.
+    """
+    if not details:
+        return {"views": 0, "reply_count": 0, "like_count": 0, "unique_contributors": 0}
+    posts = details.get("post_stream", {}).get("posts", [])
+    return {
+        "views": details.get("views", 0),
+        "reply_count": details.get("reply_count", 0),
+        "like_count": sum(post.get("like_count", 0) for post in posts),
+        "unique_contributors": len(set(post.get("username") for post in posts))
+    }
+
+def topics_metrics(listed_topics):
+    """
+    Return {topic_id: metrics} for topics from a listing or search.
+    Steps:
+      1. In incremental mode, keep the stored metrics of every topic whose
+         listing watermark matches the last run (and is not older than
+         WATERMARK_MAX_AGE_DAYS).
+      2. Fetch details, concurrently, only for the remaining topics.
+      3. Store the new watermarks and metrics for the next run.
+    Topics whose details cannot be fetched get zero metrics and no watermark.
     """
-    url = f"{DISCOURSE_BASE_URL}/t/{topic_id}.json"
-    response = requests.get(url)
-    response.raise_for_status()
-    time.sleep(THROTTLE_SECONDS)
-    return response.json()
+    topic_ids = list(dict.fromkeys(topic["id"] for topic in listed_topics))
+    stored = load_watermarks(topic_ids) if CRAWL_MODE == "incremental" else {}
+    watermarks = {topic["id"]: listing_watermark(topic) for topic in listed_topics}
+
+    metrics = {}
+    changed = []
+    for topic_id in topic_ids:
+        watermark = watermarks[topic_id]
+        previous = stored.get(topic_id)
+        if (previous and any(v is not None for v in watermark)
+                and previous[0] == watermark and previous[2] < WATERMARK_MAX_AGE_DAYS):
+            metrics[topic_id] = previous[1]
+            count_topic_stat("carried_forward")
+        else:
+            changed.append(topic_id)
+
+    details = fetch_topics_details(changed)
+    fetched = []
+    for topic_id in changed:
+        metrics[topic_id] = topic_metrics(details[topic_id])
+        if details[topic_id] is not None:
+            fetched.append((topic_id, watermarks[topic_id], metrics[topic_id]))
+    save_watermarks(fetched)
+    return metrics
 
 def collect_initial_topics():
     """
     Collect initial topics from the forum category:
+      - Stream listing pages and process topics in TOPIC_BATCH_SIZE batches
       - Avoid duplicates using a set of seen IDs
+      - Fetch details for new or changed topics concurrently (see topics_metrics)
       - Extract metrics: views, reply_count, like_count, unique contributors
       - Save raw JSON for debugging or development
     Returns a list of topics with metadata and engagement metrics.
     """
     topics = []
     seen_ids = set()
+    batch = []
 
-    raw_topics = fetch_category_topics()
-    for topic in raw_topics:
-        topic_id = topic["id"]
-        if topic_id in seen_ids:
-            continue
-        seen_ids.add(topic_id)
-
-        try:
-            details = fetch_topic_details(topic_id)
-            views = details.get("views", 0)
-            reply_count = details.get("reply_count", 0)
-            like_count = sum(post.get("like_count", 0) for post in details.get("post_stream", {}).get("posts", []))
-            unique_contributors = len(set(post.get("username") for post in details.get("post_stream", {}).get("posts", [])))
-        except Exception as e:
-            print(f"Failed to fetch topic details for {topic_id}: {e}")
-            views = reply_count = like_count = unique_contributors = 0
+    def process(batch):
+        metrics = topics_metrics(batch)
+        for topic in batch:
+            topics.append({
+                "topicId": topic["id"],
+                "title": topic.get("title", ""),
+                "blurb": topic.get("excerpt", ""),
+                **metrics[topic["id"]]
+            })
 
-        topics.append({
-            "topicId": topic_id,
-            "title": topic.get("title", ""),
-            "blurb": topic.get("excerpt", ""),
-            "reply_count": reply_count,
-            "views": views,
-            "like_count": like_count,
-            "unique_contributors": unique_contributors
-        })
+    for topic in fetch_category_topics():
+        if topic["id"] in seen_ids:
+            continue
+        seen_ids.add(topic["id"])
+        batch.append(topic)
+        if len(batch) >= TOPIC_BATCH_SIZE:
+            process(batch)
+            batch = []
+    if batch:
+        process(batch)
 
     with open("initial_forum_topics.json", "w") as f:
         json.dump(topics, f, indent=2)
@@ -107,15 +382,14 @@ def extract_search_terms_from_topics(topics):
     """
     Extract search terms from forum topics:
       - Concatenate title + blurb
-      - Use NLP processor to extract keywords
+      - Use NLP processor to extract keywords for all topics in one batch
       - Normalize and filter out excluded terms
       - Save both all terms and top terms to JSON
     Returns a list of the most common search terms up to MAX_TERMS.
     """
     all_terms = []
-    for topic in topics:
-        text = f"{topic['title']} {topic['blurb']}"
-        extracted = extract_search_terms(text)
+    texts = [f"{topic['title']} {topic['blurb']}" for topic in topics]
+    for extracted in extract_search_terms_batch(texts, ignore=EXCLUDE_TERMS):
         normalized_terms = [normalize_term(term) for term in extracted if normalize_term(term) not in EXCLUDE_TERMS]
         all_terms.extend(normalized_terms)
 
@@ -130,49 +404,48 @@ def extract_search_terms_from_topics(topics):
 
     return most_common_terms
 
+def search_topics(term):
+    """
+    Search the forum for a term. Returns up to MAX_RESULTS_SPECIFIC topics,
+    or an empty list if the search fails.
+    """
+    params = {"q": f"n8n {term} workflow", "include_blurbs": "true"}
+    try:
+        return forum_get("/search.json", params=params).get("topics", [])[:MAX_RESULTS_SPECIFIC]
+    except Exception as e:
+        print(f"Forum search failed for '{term}': {e}")
+        return []
+
 def search_specific_terms_with_topics(terms):
     """
     Search the forum for topics matching specific extracted terms:
-      - Avoid duplicates using seen_ids
-      - Fetch detailed metrics for each found topic
+      - Run the searches concurrently
+      - Avoid duplicates using seen_ids (first term to find a topic wins)
+      - Fetch detailed metrics for new or changed topics concurrently
       - Save topic IDs to JSON for debugging/reference
     Returns a list of topics with full metrics.
     """
-    seen_ids = set()
-    topics = []
-
-    for term in terms:
-        params = {"q": f"n8n {term} workflow", "include_blurbs": "true"}
-        response = requests.get(f"{DISCOURSE_BASE_URL}/search.json", params=params)
-        response.raise_for_status()
-        time.sleep(THROTTLE_SECONDS)
-        results = response.json().get("topics", [])[:MAX_RESULTS_SPECIFIC]
+    with ThreadPoolExecutor(max_workers=FORUM_WORKERS) as executor:
+        search_results = list(executor.map(search_topics, terms))
 
+    seen_ids = set()
+    found = []
+    for results in search_results:
         for topic in results:
-            topic_id = topic["id"]
-            if topic_id in seen_ids:
+            if topic["id"] in seen_ids:
                 continue
-            seen_ids.add(topic_id)
-
-            try:
-                details = fetch_topic_details(topic_id)
-                views = details.get("views", 0)
-                reply_count = details.get("reply_count", 0)
-                like_count = sum(post.get("like_count", 0) for post in details.get("post_stream", {}).get("posts", []))
-                unique_contributors = len(set(post.get("username") for post in details.get("post_stream", {}).get("posts", [])))
-            except Exception as e:
-                print(f"Failed to fetch topic details for {topic_id}: {e}")
-                views = reply_count = like_count = unique_contributors = 0
+            seen_ids.add(topic["id"])
+            found.append(topic)
 
-            topics.append({
-                "topicId": topic_id,
-                "title": topic.get("title", ""),
-                "blurb": topic.get("blurb", ""),
-                "reply_count": reply_count,
-                "views": views,
-                "like_count": like_count,
-                "unique_contributors": unique_contributors
-            })
+    metrics = topics_metrics(found)
+    topics = []
+    for topic in found:
+        topics.append({
+            "topicId": topic["id"],
+            "title": topic.get("title", ""),
+            "blurb": topic.get("blurb", ""),
+            **metrics[topic["id"]]
+        })
 
     with open("specific_forum_topic_ids.json", "w") as f:
         json.dump(list(seen_ids), f, indent=2)
@@ -193,6 +466,7 @@ def build_forum_data(topics):
         contributors = topic.get("unique_contributors", 0)
         forum_data.append({
             "workflow": topic.get("title", ""),
+            "topic_id": topic.get("topicId"),
             "platform": "n8n Forum",
             "popularity_metrics": {
                 "views": views,
@@ -205,7 +479,7 @@ def build_forum_data(topics):
 
 def main():
     """
-    Main entry point:
+    Main entry point (each stage is checkpointed; see checkpoints.run_stage):
       - Initialize database
       - Collect initial forum topics
       - Extract top search terms
@@ -215,19 +489,23 @@ def main():
     """
     init_db()
     print("Collecting initial forum topics...")
-    initial_topics = collect_initial_topics()
+    initial_topics = run_stage("forum", "initial_topics", collect_initial_topics)
 
     print("Extracting most popular normalized search terms from forum...")
-    top_terms = extract_search_terms_from_topics(initial_topics)
+    top_terms = run_stage("forum", "top_terms", extract_search_terms_from_topics, initial_topics)
 
     print("Searching specific forum topics using extracted terms...")
-    specific_topics = search_specific_terms_with_topics(top_terms)
+    specific_topics = run_stage("forum", "specific_topics", search_specific_terms_with_topics, top_terms)
 
     print("Building forum data with popularity metrics...")
     final_data = build_forum_data(specific_topics)
 
-    insert_results("forum", final_data)
+    run_stage("forum", "inserted", insert_results, "forum", final_data)
     print("Forum results inserted into database.")
+    print(f"Topic details: {topic_cache_stats['downloaded']} downloaded, "
+          f"{topic_cache_stats['not_modified']} unchanged since last run, "
+          f"{topic_cache_stats['memo']} reused within this run, "
+          f"{topic_cache_stats['carried_forward']} carried forward without a request")
     return final_data
 
 # ---------- ENTRY POINT ----------
@@ -0,0 +1,180 @@
+from typing import Optional
+import numpy as np
+
+# Default weights per source. Keys are the weight names accepted as
+# per-request overrides by the API (e.g. ?w_views=1&w_likes=15).
+FORUM_WEIGHTS = {
+    "views": 1.0,
+    "replies": 20.0,
+    "likes": 10.0,
+    "unique_contributors": 30.0,
+}
+
+GOOGLE_WEIGHTS = {
+    "avg_interest": 0.4,
+    "latest_interest": 0.6,
+    "trend_up": 10.0,      # bonus when the trend is "up"
+    "trend_down": -5.0,    # penalty when the trend is "down"
+}
+
+YOUTUBE_WEIGHTS = {
+    "views": 1.0,
+    "likes": 20.0,
+    "comments": 30.0,
+    "like_to_view_ratio": 5000.0,
+    "comment_to_view_ratio": 8000.0,
+}
+
+DEFAULT_WEIGHTS = {
+    "google": GOOGLE_WEIGHTS,
+    "forum": FORUM_WEIGHTS,
+    "youtube": YOUTUBE_WEIGHTS,
+}
+
+
+def score_forum(popularity_metrics: dict) -> float:
+    """
+    Combine forum metrics into a single popularity score.
+    - Views: baseline weight
+    - Replies: weighted more since it means engagement
+    - Likes: weighted similarly to replies
+    - Unique contributors: strong indicator of discussion quality
+    """
+    views = popularity_metrics.get("views", 0)
+    replies = popularity_metrics.get("replies", 0)
+    likes = popularity_metrics.get("likes", 0)
+    contributors = popularity_metrics.get("unique_contributors", 0)
+
+    score = (
+        (views * FORUM_WEIGHTS["views"]) +
+        (replies * FORUM_WEIGHTS["replies"]) +
+        (likes * FORUM_WEIGHTS["likes"]) +
+        (contributors * FORUM_WEIGHTS["unique_contributors"])
+    )
+    return score
+
+
+def score_google(metrics: dict) -> float:
+    """
+    Combine avg_interest, latest_interest, and trend.
+    Weight latest interest slightly more than average.
+    Give a small bonus/penalty for trend.
+    """
+    avg_interest = metrics.get("avg_interest") or 0
+    latest_interest = metrics.get("latest_interest") or 0
+    trend = metrics.get("trend", "stable")
+
+    trend_bonus = 0
+    if trend == "up":
+        trend_bonus = GOOGLE_WEIGHTS["trend_up"]
+    elif trend == "down":
+        trend_bonus = GOOGLE_WEIGHTS["trend_down"]
+
+    score = (
+        (avg_interest * GOOGLE_WEIGHTS["avg_interest"]) +
+        (latest_interest * GOOGLE_WEIGHTS["latest_interest"]) +
+        trend_bonus
+    )
+    return score
+
+
+def score_youtube(popularity_metrics: dict) -> float:
+    """
+    Combine YouTube metrics fairly.
+    Views are baseline, likes and comments have stronger weight.
+    Ratios (like_to_view, comment_to_view) normalize engagement.
+    """
+    views = popularity_metrics.get("views", 0)
+    likes = popularity_metrics.get("likes", 0)
+    comments = popularity_metrics.get("comments", 0)
+    like_ratio = popularity_metrics.get("like_to_view_ratio", 0)
+    comment_ratio = popularity_metrics.get("comment_to_view_ratio", 0)
+
+    score = (
+        (views * YOUTUBE_WEIGHTS["views"]) +
+        (likes * YOUTUBE_WEIGHTS["likes"]) +
+        (comments * YOUTUBE_WEIGHTS["comments"]) +
+        (like_ratio * YOUTUBE_WEIGHTS["like_to_view_ratio"]) +
+        (comment_ratio * YOUTUBE_WEIGHTS["comment_to_view_ratio"])
+    )
+    return score
+
+
+# Scorer for each data source, used at ingest time to precompute popularity_score
+SCORERS = {
+    "google": score_google,
+    "forum": score_forum,
+    "youtube": score_youtube,
+}
+
+
+def score_metrics(source: str, metrics: dict) -> Optional[float]:
+    """
+    Score a metrics dict with the scorer registered for its source.
+    Returns None for unknown sources or missing metrics; the score is stored
+    as NULL, which SQLite sorts last under ORDER BY popularity_score DESC.
+    """
+    scorer = SCORERS.get(source)
+    if scorer is None or not metrics:
+        return None
+    return scorer(metrics)
+
+
+# Largest accepted weight override; with metrics in the billions, scores
+# stay far from float overflow
+MAX_WEIGHT_MAGNITUDE = 1e6
+
+
+def resolve_weights(source: str, overrides: dict = None) -> dict:
+    """
+    Merge caller-supplied weight overrides into the source's default weights.
+    Raises ValueError for an unknown source or weight name.
+    """
+    if source not in DEFAULT_WEIGHTS:
+        raise ValueError(f"Unknown source: {source}")
+    weights = dict(DEFAULT_WEIGHTS[source])
+    for name, value in (overrides or {}).items():
+        if name not in weights:
+            raise ValueError(f"Unknown weight '{name}' for source '{source}'")
+        weights[name] = float(value)
+    return weights
+
+
+def metric_columns(source: str, metrics_list: list) -> dict:
+    """
+    Load a source's metrics dicts into NumPy column arrays, one per weight name.
+    Missing or null metrics become 0. For Google, the categorical trend is
+    expanded into 0/1 'trend_up' and 'trend_down' columns.
+    Build these once per data refresh and reuse them for every weighting.
+    """
+    columns = {}
+    for name in DEFAULT_WEIGHTS[source]:
+        if source == "google" and name in ("trend_up", "trend_down"):
+            direction = name.split("_", 1)[1]
+            values = [1.0 if (m or {}).get("trend") == direction else 0.0 for m in metrics_list]
+        else:
+            values = [(m or {}).get(name) or 0.0 for m in metrics_list]
+        columns[name] = np.asarray(values, dtype=np.float64)
+    return columns
+
+
+def score_columns(columns: dict, weights: dict) -> np.ndarray:
+    """
+    Score every row in one vectorized pass: the weighted sum of the metric columns.
+    """
+    size = len(next(iter(columns.values()))) if columns else 0
+    scores = np.zeros(size, dtype=np.float64)
+    for name, weight in weights.items():
+        scores += columns[name] * weight
+    return scores
+
+
+def top_indices(scores: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Return the indices of the `limit` highest scores, best first.
+    Uses a partial sort so only the top rows are ever fully ordered.
+    """
+    if limit >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, limit)[:limit]
+    return top[np.argsort(-scores[top], kind="stable")]
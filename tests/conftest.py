@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import db_handler  # noqa: E402
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """
+    Point db_handler at a fresh database in a temp directory (also the cwd,
+    so caches the modules write land there) and initialize it.
+    """
+    monkeypatch.chdir(tmp_path)
+    db_path = str(tmp_path / "workflow_trends.db")
+    monkeypatch.setattr(db_handler, "DB_PATH", db_path)
+    db_handler.init_db()
+    return db_path
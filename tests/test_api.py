@@ -0,0 +1,114 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import api  # noqa: E402
+from db_handler import insert_results  # noqa: E402
+
+
+YOUTUBE_RESULTS = [
+    {"workflow": f"Video {i}", "platform": "YouTube", "video_id": f"vid{i}",
+     "popularity_metrics": {"views": 100 * i, "likes": i, "comments": 1,
+                            "like_to_view_ratio": 0.01, "comment_to_view_ratio": 0.001}}
+    for i in range(1, 6)
+]
+
+
+@pytest.fixture
+def client(temp_db, monkeypatch):
+    monkeypatch.setattr(api, "DB_PATH", temp_db)
+    monkeypatch.setattr(api, "read_pool", None)
+    api._response_cache.clear()
+    api._rescored_cache.clear()
+    monkeypatch.setattr(api, "_cache_generation", None)
+    insert_results("youtube", YOUTUBE_RESULTS)
+    with TestClient(api.app) as test_client:
+        yield test_client
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf"])
+def test_non_finite_weights_are_rejected(client, value):
+    response = client.get("/youtube", params={"w_views": value})
+    assert response.status_code == 422
+    assert "w_views" in response.json()["detail"]
+
+
+def test_oversized_weights_are_rejected(client):
+    response = client.get("/youtube", params={"w_views": "1e308"})
+    assert response.status_code == 422
+    assert "w_views" in response.json()["detail"]
+
+
+def test_overflowing_scores_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(api, "MAX_WEIGHT_MAGNITUDE", float("inf"))
+    response = client.get("/youtube", params={"w_views": "1e308"})
+    assert response.status_code == 400
+
+
+def test_unknown_weight_names_are_rejected(client):
+    response = client.get("/forum", params={"w_view": 5})
+    assert response.status_code == 400
+    assert "w_view" in response.json()["detail"]
+    assert client.get("/all").status_code == 200
+
+
+def test_rescored_cache_is_bounded(client, monkeypatch):
+    monkeypatch.setattr(api, "RESCORED_CACHE_SIZE", 3)
+    for weight in range(10):
+        response = client.get("/youtube", params={"w_views": weight})
+        assert response.status_code == 200
+    assert len(api._rescored_cache) == 3
+    # The most recently used weightings are the ones kept
+    assert [dict(key[2])["views"] for key in api._rescored_cache] == [7.0, 8.0, 9.0]
+    client.get("/youtube", params={"w_views": 7})
+    assert [dict(key[2])["views"] for key in api._rescored_cache] == [8.0, 9.0, 7.0]
+
+
+def test_rescored_ranking_uses_weights(client):
+    response = client.get("/youtube", params={"w_views": -1})
+    results = response.json()["results"]
+    assert results[0]["workflow"] == "Video 1"
+
+
+def youtube_views(views_by_video):
+    return [
+        {"workflow": f"Video {i}", "platform": "YouTube", "video_id": f"vid{i}",
+         "popularity_metrics": {"views": views, "likes": 1, "comments": 1,
+                                "like_to_view_ratio": 0.01, "comment_to_view_ratio": 0.001}}
+        for i, views in views_by_video.items()
+    ]
+
+
+def test_trending_as_of_follows_the_latest_ingest(client):
+    from datetime import date
+
+    insert_results("youtube", youtube_views({1: 100, 2: 100, 3: 100}), snapshot_date=date(2026, 1, 1))
+    insert_results("youtube", youtube_views({1: 150, 2: 400, 3: 100}), snapshot_date=date(2026, 1, 2))
+    # Unchanged metrics write no snapshot, but the data is still as of Jan 3
+    insert_results("youtube", youtube_views({1: 150, 2: 400, 3: 100}), snapshot_date=date(2026, 1, 3))
+
+    body = client.get("/trending/youtube", params={"metric": "views", "days": 2}).json()
+    assert body["as_of"] == "2026-01-03"
+    assert body["baseline_date"] == "2026-01-01"
+    assert [(r["workflow"], r["delta"]) for r in body["results"]] == [
+        ("Video 2", 300), ("Video 1", 50), ("Video 3", 0)
+    ]
+    assert body["results"][0]["growth_rate"] == 3.0
+
+
+def test_trending_rejects_days_beyond_retention(client):
+    assert client.get("/trending/forum", params={"days": 1000000}).status_code == 400
+    assert client.get("/trending/forum", params={"days": 0}).status_code == 400
+
+
+def test_growth_query_seeks_the_baseline_once_per_workflow(temp_db):
+    import sqlite3
+
+    with sqlite3.connect(temp_db) as conn:
+        plan = conn.execute("EXPLAIN QUERY PLAN " + api.GROWTH_QUERY, ("$.views", "2026-01-01", "forum", 20)).fetchall()
+    details = [row[3] for row in plan]
+    assert sum("CORRELATED SCALAR SUBQUERY" in detail for detail in details) == 1
+    assert any("USING PRIMARY KEY" in detail for detail in details)
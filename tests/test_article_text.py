@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("lxml")
+
+from google_search_handler import html_to_text  # noqa: E402
+
+
+def test_article_header_and_footer_are_kept():
+    page = b"""<html><body>
+        <header>Site menu</header>
+        <article>
+            <header><h1>Slack to Notion</h1></header>
+            <p>Send every new message to a database.</p>
+            <footer>Posted by Ann</footer>
+        </article>
+        <footer>Copyright</footer>
+    </body></html>"""
+    text = html_to_text(page)
+    assert "Slack to Notion" in text
+    assert "Posted by Ann" in text
+    assert "Site menu" not in text
+    assert "Copyright" not in text
+
+
+def test_page_chrome_is_dropped_without_article():
+    page = b"""<html><body>
+        <header>Site menu</header>
+        <div><p>Plain page body.</p></div>
+        <footer>Copyright</footer>
+    </body></html>"""
+    assert html_to_text(page) == "Plain page body."
+
+
+def test_wordpress_entry_header_is_kept():
+    page = b"""<html><body class="post-template-default">
+        <div id="page" class="site">
+            <header id="masthead" class="site-header"><p class="site-title">My Blog</p></header>
+            <main id="main" class="site-main">
+                <article id="post-42" class="post-42 post type-post status-publish">
+                    <header class="entry-header">
+                        <h1 class="entry-title">Automating invoices with n8n</h1>
+                        <div class="entry-meta"><span class="posted-on">May 1, 2026</span></div>
+                    </header>
+                    <div class="entry-content"><p>Start with a Gmail trigger and parse each PDF.</p></div>
+                    <footer class="entry-footer"><span class="cat-links">Automation</span></footer>
+                    <div class="sharedaddy sd-sharing-enabled share-buttons">Share this</div>
+                </article>
+            </main>
+            <footer id="colophon" class="site-footer">Powered by WordPress</footer>
+        </div>
+    </body></html>"""
+    text = html_to_text(page)
+    assert text.startswith("Automating invoices with n8n")
+    assert "Start with a Gmail trigger" in text
+    assert "Automation" in text
+    assert "My Blog" not in text
+    assert "Share this" not in text
+    assert "Powered by WordPress" not in text
@@ -0,0 +1,68 @@
+import math
+import shutil
+import struct
+import wave
+
+import pytest
+
+import youtube_handler
+
+
+def find_ffmpeg():
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    imageio_ffmpeg = pytest.importorskip("imageio_ffmpeg")
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    monkeypatch.setattr(youtube_handler, "FFMPEG_BIN", find_ffmpeg())
+
+
+@pytest.fixture
+def tone(tmp_path):
+    """A 3-second 440 Hz mono WAV at 8 kHz (resampled to 16 kHz on decode)."""
+    path = tmp_path / "tone.wav"
+    rate = 8000
+    frames = b"".join(
+        struct.pack("<h", int(10000 * math.sin(2 * math.pi * 440 * i / rate)))
+        for i in range(3 * rate)
+    )
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(frames)
+    return str(path)
+
+
+def test_full_policy_keeps_every_sample(ffmpeg, tone):
+    audio = youtube_handler.load_audio_file(tone, policy="full")
+    assert audio.dtype.name == "float32"
+    assert abs(audio.size - 3 * youtube_handler.SAMPLE_RATE) < youtube_handler.SAMPLE_RATE // 100
+    assert 0.2 < float(abs(audio).max()) < 0.4
+
+
+def test_head_policy_stops_at_max_seconds(ffmpeg, tone, monkeypatch):
+    monkeypatch.setattr(youtube_handler, "TRANSCRIBE_MAX_SECONDS", 1)
+    audio = youtube_handler.load_audio_file(tone, policy="head")
+    assert audio.size == youtube_handler.SAMPLE_RATE
+
+
+def test_decode_keeps_only_the_selected_segments(ffmpeg, tone):
+    command = youtube_handler.ffmpeg_pcm_command(tone)
+    audio = youtube_handler.decode_audio(command, [(0.0, 0.5), (2.0, 2.25)])
+    assert audio.size == youtube_handler.SAMPLE_RATE * 3 // 4
+
+
+def test_window_segments_span_the_video(monkeypatch):
+    monkeypatch.setattr(youtube_handler, "TRANSCRIBE_WINDOWS", 3)
+    monkeypatch.setattr(youtube_handler, "TRANSCRIBE_WINDOW_SECONDS", 10)
+    assert youtube_handler.sampling_segments(100, "windows") == [(0.0, 10.0), (45.0, 55.0), (90.0, 100.0)]
+    # Short videos and the "full" policy are transcribed whole
+    assert youtube_handler.sampling_segments(25, "windows") == [(0.0, None)]
+    assert youtube_handler.sampling_segments(100, "full") == [(0.0, None)]
+    with pytest.raises(ValueError):
+        youtube_handler.sampling_segments(100, "middle")
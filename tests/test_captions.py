@@ -0,0 +1,73 @@
+import os
+import sys
+import types
+
+import youtube_handler
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+def test_manual_vtt():
+    text = youtube_handler.parse_subtitle_file(fixture("captions_manual.vtt"))
+    # Cue identifiers ("intro", numbers) go; a caption that is just "5" stays
+    assert text == "Today we connect Slack to Notion in under & about 5 minutes with n8n."
+
+
+def test_auto_vtt_drops_rolling_repeats_and_karaoke_tags():
+    text = youtube_handler.parse_subtitle_file(fixture("captions_auto.vtt"))
+    assert text == "so first we add a webhook trigger"
+
+
+def test_srt_keeps_digit_only_captions():
+    text = youtube_handler.parse_subtitle_file(fixture("captions.srt"))
+    assert text == "Workflows built in 2024 Google Sheets to Airtable"
+
+
+def fake_yt_dlp(monkeypatch, manual, auto, calls):
+    """
+    Install a yt_dlp module whose YoutubeDL writes the fixture tracks the
+    way yt-dlp does: a manual track wins over an auto one per language.
+    """
+    class YoutubeDL:
+        def __init__(self, options):
+            self.options = options
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download):
+            calls.append(url)
+            requested = {}
+            for lang, name in {**auto, **manual}.items():
+                path = self.options["outtmpl"].replace("%(id)s", "vid").replace("%(ext)s", f"{lang}.vtt")
+                with open(fixture(name)) as src, open(path, "w") as dst:
+                    dst.write(src.read())
+                requested[lang] = {"ext": "vtt", "filepath": path}
+            return {"subtitles": {lang: [] for lang in manual},
+                    "automatic_captions": {lang: [] for lang in auto},
+                    "requested_subtitles": requested}
+
+    monkeypatch.setitem(sys.modules, "yt_dlp", types.SimpleNamespace(YoutubeDL=YoutubeDL))
+
+
+def test_fetch_captions_prefers_manual_in_one_call(monkeypatch):
+    calls = []
+    fake_yt_dlp(monkeypatch, {"en": "captions_manual.vtt"}, {"en-orig": "captions_auto.vtt"}, calls)
+    text, kind = youtube_handler.fetch_captions("vid")
+    assert kind == "manual"
+    assert text.startswith("Today we connect Slack")
+    assert len(calls) == 1
+
+
+def test_fetch_captions_falls_back_to_auto(monkeypatch):
+    calls = []
+    fake_yt_dlp(monkeypatch, {}, {"en": "captions_auto.vtt"}, calls)
+    assert youtube_handler.fetch_captions("vid") == ("so first we add a webhook trigger", "auto")
+    assert len(calls) == 1
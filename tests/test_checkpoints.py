@@ -0,0 +1,28 @@
+import os
+
+import checkpoints
+
+
+def test_standalone_run_writes_no_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(checkpoints.RUN_ID_ENV, raising=False)
+    assert checkpoints.run_stage("forum", "topics", lambda: [1, 2]) == [1, 2]
+    assert not os.path.exists(checkpoints.CHECKPOINT_DIR)
+    assert checkpoints.RUN_ID_ENV not in os.environ
+
+
+def test_resumed_run_reuses_completed_stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # start_run sets these; registering them restores the environment afterwards
+    monkeypatch.setenv(checkpoints.RUN_ID_ENV, "")
+    monkeypatch.setenv(checkpoints.RESUME_ENV, "")
+    monkeypatch.setattr(checkpoints, "_recomputed_handlers", set())
+    checkpoints.start_run("run-1")
+    checkpoints.run_stage("forum", "topics", lambda: [1, 2])
+
+    monkeypatch.setattr(checkpoints, "_recomputed_handlers", set())
+    checkpoints.start_run("run-1", resume=True)
+    assert checkpoints.run_stage("forum", "topics", lambda: [3]) == [1, 2]
+    # Stages after a recomputed one are recomputed too
+    assert checkpoints.run_stage("forum", "terms", lambda: ["a"]) == ["a"]
+    assert checkpoints.run_stage("forum", "topics", lambda: [3]) == [3]
@@ -0,0 +1,55 @@
+import sqlite3
+
+import db_handler
+from db_handler import insert_results
+
+
+def forum_result(topic_id, title, views):
+    return {"workflow": title, "topic_id": topic_id, "platform": "n8n Forum",
+            "popularity_metrics": {"views": views, "replies": 0, "likes": 0, "unique_contributors": 1}}
+
+
+def rows(db_path, source):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT natural_key, workflow FROM workflow_trends WHERE source = ? ORDER BY natural_key", (source,)
+        ).fetchall()
+
+
+def test_same_title_topics_are_kept_apart(temp_db):
+    insert_results("forum", [forum_result(1, "Slack to Notion", 10), forum_result(2, "Slack to Notion", 20)])
+    assert rows(temp_db, "forum") == [("1", "Slack to Notion"), ("2", "Slack to Notion")]
+
+
+def test_renamed_topic_updates_its_title(temp_db):
+    insert_results("forum", [forum_result(1, "Old title", 10)])
+    assert insert_results("forum", [forum_result(1, "New title", 10)]) == 1
+    assert rows(temp_db, "forum") == [("1", "New title")]
+
+
+def test_partial_run_keeps_missing_rows(temp_db):
+    insert_results("forum", [forum_result(1, "A", 10), forum_result(2, "B", 20)])
+    insert_results("forum", [forum_result(1, "A", 11)], delete_missing=False)
+    assert [key for key, _ in rows(temp_db, "forum")] == ["1", "2"]
+    insert_results("forum", [forum_result(1, "A", 12)])
+    assert [key for key, _ in rows(temp_db, "forum")] == ["1"]
+
+
+def test_backfill_logs_deleted_duplicates(tmp_path, monkeypatch, capsys):
+    db_path = str(tmp_path / "old.db")
+    monkeypatch.setattr(db_handler, "DB_PATH", db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE workflow_trends (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL, term TEXT, workflow TEXT,
+                platform TEXT, metrics_json TEXT NOT NULL, popularity_score REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO workflow_trends (source, workflow, metrics_json, popularity_score) VALUES ('forum', ?, '{}', 0)",
+            [("A",), ("A",), ("B",)]
+        )
+    db_handler.init_db()
+    assert "deleted 1 duplicate" in capsys.readouterr().out
+    assert [key for key, _ in rows(db_path, "forum")] == ["A", "B"]
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("spacy")
+
+import description_processor  # noqa: E402
+from integration_vocabulary import INTEGRATIONS, CASE_SENSITIVE_INTEGRATIONS  # noqa: E402
+
+
+def test_short_and_dotted_names_are_returned():
+    [terms] = description_processor.extract_search_terms_fast(
+        ["Copy S3 files to monday.com, book via Cal.com and post to Slack, then Slack again."]
+    )
+    assert terms == ["S3", "Monday.com", "Cal.com", "Slack"]
+
+
+def test_every_vocabulary_name_matches_itself():
+    texts = list(INTEGRATIONS) + [f"we connect it to {name} today" for name in CASE_SENSITIVE_INTEGRATIONS]
+    names = list(INTEGRATIONS) + list(CASE_SENSITIVE_INTEGRATIONS)
+    results = description_processor.extract_search_terms_fast(texts)
+    assert [name for name, terms in zip(names, results) if name not in terms] == []
+
+
+def test_case_sensitive_names_need_a_mid_sentence_capital():
+    texts = [
+        "Make sure you Close the tab and read Medium posts about Linear algebra",
+        "Box is where we start. Signal: the next step",
+        "Send Alerts To Signal And Save Files In Box",
+        "we send alerts to Signal and save files in Box.",
+    ]
+    assert description_processor.extract_search_terms_fast(texts) == [[], [], [], ["Signal", "Box"]]
+
+
+def test_fallback_ignores_the_callers_excluded_terms(monkeypatch):
+    sent = []
+
+    def transformer(texts, batch_size, n_process):
+        sent.extend(texts)
+        return [["Fallback"] for _ in texts]
+
+    monkeypatch.setattr(description_processor, "extract_search_terms_transformer", transformer)
+    texts = ["My n8n YouTube channel", "n8n with Slack"]
+    results = description_processor.extract_search_terms_batch(texts, mode="fast", ignore={"n8n", "youtube"})
+    assert results == [["Fallback"], ["n8n", "Slack"]]
+    assert sent == ["My n8n YouTube channel"]
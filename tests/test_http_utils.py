@@ -0,0 +1,84 @@
+import types
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import http_utils
+from http_utils import TokenBucket, retry_after_seconds
+
+
+class FakeResponse:
+    def __init__(self, retry_after=None):
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+
+class FakeClock:
+    """
+    Stands in for time.monotonic/time.sleep so bucket tests run instantly.
+    Tests use rates whose intervals are exact in binary floating point.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_utils, "time", types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_pause_blocks_until_it_ends(clock):
+    bucket = TokenBucket(rate=4, capacity=4)
+    bucket.pause(5)
+    bucket.acquire()
+    assert clock.sleeps == [5.0, 0.25]
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(FakeResponse("7"), attempt=0) == 7.0
+    assert retry_after_seconds(FakeResponse("-3"), attempt=0) == 0.0
+    assert retry_after_seconds(FakeResponse("100000"), attempt=0) == http_utils.MAX_RETRY_AFTER_SECONDS
+
+
+def test_retry_after_http_date():
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= retry_after_seconds(FakeResponse(when), attempt=0) <= 30
+
+
+def test_retry_after_falls_back_to_backoff():
+    assert retry_after_seconds(FakeResponse(), attempt=0) == http_utils.BACKOFF_SECONDS
+    assert retry_after_seconds(FakeResponse(), attempt=3) == http_utils.BACKOFF_SECONDS * 8
+    assert retry_after_seconds(FakeResponse("soon"), attempt=1) == http_utils.BACKOFF_SECONDS * 2
+
@@ -0,0 +1,51 @@
+import sqlite3
+import zlib
+
+import pytest
+
+import youtube_handler
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "transcript_cache.db")
+    monkeypatch.setattr(youtube_handler, "TRANSCRIPT_CACHE_PATH", path)
+    monkeypatch.setattr(youtube_handler, "_transcript_conn", None)
+    yield path
+    if youtube_handler._transcript_conn is not None:
+        youtube_handler._transcript_conn.close()
+
+
+def test_transcripts_are_keyed_by_sampling_policy(cache_path, monkeypatch):
+    monkeypatch.setattr(youtube_handler, "TRANSCRIBE_POLICY", "head")
+    monkeypatch.setattr(youtube_handler, "TRANSCRIBE_MAX_SECONDS", 600)
+    youtube_handler.save_transcript("vid", "first ten minutes")
+    assert youtube_handler.load_cached_transcript("vid") == "first ten minutes"
+
+    # A different limit or policy must not reuse the partial transcript
+    monkeypatch.setattr(youtube_handler, "TRANSCRIBE_MAX_SECONDS", 300)
+    assert youtube_handler.load_cached_transcript("vid") is None
+    monkeypatch.setattr(youtube_handler, "TRANSCRIBE_POLICY", "full")
+    assert youtube_handler.load_cached_transcript("vid") is None
+
+
+def test_old_cache_keeps_captions_only(cache_path):
+    conn = sqlite3.connect(cache_path)
+    conn.execute("""
+        CREATE TABLE transcripts (
+            video_id TEXT NOT NULL, model_size TEXT NOT NULL, language TEXT NOT NULL,
+            transcript BLOB NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (video_id, model_size, language)
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO transcripts (video_id, model_size, language, transcript) VALUES (?, ?, 'auto', ?)",
+        [("vid", youtube_handler.CAPTIONS_CACHE_KEY, zlib.compress(b"captions")),
+         ("vid", "tiny", zlib.compress(b"whisper"))]
+    )
+    conn.commit()
+    conn.close()
+
+    assert youtube_handler.load_cached_transcript(
+        "vid", model_size=youtube_handler.CAPTIONS_CACHE_KEY, sampling="full") == "captions"
+    assert youtube_handler.load_cached_transcript("vid", model_size="tiny", sampling="full") is None
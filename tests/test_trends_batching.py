@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import google_search_handler as g  # noqa: E402
+
+ANCHOR = g.TRENDS_ANCHOR
+INDEX = pd.date_range("2026-01-04", periods=4, freq="W")
+
+
+def payload(**columns):
+    """A recorded-style interest_over_time() frame: term columns plus isPartial."""
+    df = pd.DataFrame({name.replace("_", " "): values for name, values in columns.items()}, index=INDEX)
+    df["isPartial"] = False
+    return df
+
+
+def test_trend_batches_share_the_anchor():
+    terms = ["A", "B", "n8n", "C", "D", "E", "A"]
+    assert g.trend_batches(terms, batch_size=3) == [[ANCHOR, "A", "B"], [ANCHOR, "C", "D"], [ANCHOR, "E"]]
+    assert g.trend_batches([]) == [[ANCHOR]]
+
+
+def test_rescale_puts_batches_on_the_anchor_scale():
+    # True interest: anchor 40, Slack 80, Notion 10, Airtable 20.
+    # Payload 1 peaks at Slack (80 -> 100); payload 2 peaks at the anchor (40 -> 100).
+    first = payload(**{ANCHOR: [50, 50, 50, 50], "Slack": [100, 100, 100, 100]})
+    second = payload(**{ANCHOR: [100, 100, 100, 100], "Notion": [25, 25, 25, 25], "Airtable": [50, 40, 50, 60]})
+
+    scaled = g.rescale_batches([first, second])
+
+    assert set(scaled) == {ANCHOR, "Slack", "Notion", "Airtable"}
+    assert scaled["Slack"].tolist() == [100.0] * 4
+    assert scaled[ANCHOR].tolist() == [50.0] * 4
+    assert scaled["Notion"].tolist() == [12.5] * 4
+    assert scaled["Airtable"].tolist() == [25.0, 20.0, 25.0, 30.0]
+
+
+def test_zero_anchor_batch_is_skipped_without_dividing_by_zero():
+    good = payload(**{ANCHOR: [50, 50, 50, 50], "Slack": [100, 100, 100, 100]})
+    zero_anchor = payload(**{ANCHOR: [0, 0, 0, 0], "Notion": [100, 80, 60, 40]})
+
+    with np.errstate(all="raise"):
+        scaled = g.rescale_batches([zero_anchor, good])
+
+    assert "Notion" not in scaled
+    assert scaled["Slack"].tolist() == [100.0] * 4
+    assert all(np.isfinite(series).all() for series in scaled.values())
+
+
+def test_only_zero_anchor_batches_give_no_series():
+    zero_anchor = payload(**{ANCHOR: [0, 0, 0, 0], "Notion": [0, 0, 0, 0]})
+    assert g.rescale_batches([zero_anchor, None, pd.DataFrame()]) == {}
+
+
+def test_series_metrics():
+    metrics = g.series_metrics(pd.Series([25.0, 20.0, 25.0, 30.0], index=INDEX))
+    assert metrics == {"avg_interest": 25.0, "latest_interest": 30.0, "trend": "up"}
+    assert g.series_metrics(pd.Series([10.0, 5.0]))["trend"] == "down"
+    assert g.series_metrics(pd.Series([7.0]))["trend"] == "stable"
+
+
+def test_batched_interest_matches_a_common_scale():
+    # Synthetic "true" interest for 20 terms; each payload is rounded and
+    # scaled to its own maximum of 100, as Trends returns it
+    rng = np.random.default_rng(7)
+    index = pd.date_range("2026-01-04", periods=13, freq="W")
+    terms = [f"Term {i}" for i in range(20)]
+    levels = np.concatenate(([40.0], rng.lognormal(2.5, 1.0, len(terms))))
+    truth = pd.DataFrame(
+        {name: level * rng.uniform(0.9, 1.1, len(index)) for name, level in zip([ANCHOR] + terms, levels)},
+        index=index
+    )
+
+    def simulate(keywords):
+        df = truth[keywords]
+        return (df * (100.0 / df.to_numpy().max())).round().astype(int)
+
+    batches = g.trend_batches(terms)
+    scaled = g.rescale_batches([simulate(batch) for batch in batches])
+    true_scaled = truth * (100.0 / truth.to_numpy().max())
+
+    assert len(batches) == 5
+    for term in terms:
+        assert scaled[term].mean() == pytest.approx(true_scaled[term].mean(), abs=1.0)
@@ -0,0 +1,72 @@
+import youtube_handler
+from youtube_client import YouTubeClient
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+    content = b"{}"
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"items": [{"id": video_id} for video_id in self.ids]}
+
+
+def quota_client(tmp_path, daily_quota):
+    client = YouTubeClient("key", cache_path=str(tmp_path / "api_cache.db"), daily_quota=daily_quota)
+    client.session.get = lambda url, params, headers, timeout: FakeResponse(params["id"].split(","))
+    return client
+
+
+def test_video_details_return_fetched_items_when_quota_runs_out(tmp_path, monkeypatch):
+    # 60 IDs need two videos.list requests; the quota only covers the first
+    client = quota_client(tmp_path, daily_quota=1)
+    monkeypatch.setattr(youtube_handler, "get_client", lambda: client)
+
+    details = youtube_handler.get_video_details([f"v{i}" for i in range(60)])
+
+    assert [item["id"] for item in details] == [f"v{i}" for i in range(50)]
+    assert client.quota_exceeded
+
+
+def test_video_details_complete_within_quota(tmp_path, monkeypatch):
+    client = quota_client(tmp_path, daily_quota=10)
+    monkeypatch.setattr(youtube_handler, "get_client", lambda: client)
+
+    details = youtube_handler.get_video_details([f"v{i}" for i in range(60)])
+
+    assert len(details) == 60
+    assert not client.quota_exceeded
+
+
+def test_quota_flag_survives_a_resume(tmp_path, monkeypatch):
+    import checkpoints
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(checkpoints.RUN_ID_ENV, "")
+    monkeypatch.setenv(checkpoints.RESUME_ENV, "")
+    monkeypatch.setattr(checkpoints, "_recomputed_handlers", set())
+    checkpoints.start_run("run-1")
+
+    # First attempt: the quota runs out while the stage fetches details
+    client = quota_client(tmp_path, daily_quota=1)
+    monkeypatch.setattr(youtube_handler, "get_client", lambda: client)
+    details, complete = youtube_handler.quota_stage(
+        "video_data", youtube_handler.get_video_details, [f"v{i}" for i in range(60)]
+    )
+    assert len(details) == 50 and not complete
+
+    # Retry in a new process: the stage comes from the checkpoint and this
+    # process's client never hit the quota
+    (tmp_path / "retry").mkdir()
+    fresh = quota_client(tmp_path / "retry", daily_quota=10)
+    monkeypatch.setattr(youtube_handler, "get_client", lambda: fresh)
+    monkeypatch.setattr(checkpoints, "_recomputed_handlers", set())
+    checkpoints.start_run("run-1", resume=True)
+    details, complete = youtube_handler.quota_stage("video_data", lambda: [])
+    assert len(details) == 50 and not complete
@@ -0,0 +1,190 @@
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from http_utils import build_session
+
+try:
+    from zoneinfo import ZoneInfo
+    # The YouTube Data API quota resets at midnight Pacific time
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TIMEZONE = timezone.utc
+
+BASE_URL = "https://www.googleapis.com/youtube/v3"
+API_CACHE_PATH = "youtube_api_cache.db"
+
+# Quota units charged per request, per endpoint
+# (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    "search": 100,
+    "videos": 1,
+}
+DAILY_QUOTA = 10000
+# videos.list accepts at most this many IDs per request
+MAX_IDS_PER_REQUEST = 50
+POOL_SIZE = 10
+REQUEST_TIMEOUT_SECONDS = 30
+
+
+class QuotaExceededError(RuntimeError):
+    """
+    Raised instead of sending a request that would exceed the daily quota.
+    For calls made of several requests (videos), `partial_items` holds the
+    items fetched before the quota ran out.
+    """
+    partial_items = ()
+
+
+class YouTubeClient:
+    """
+    YouTube Data API client shared by all calls in a run:
+      - One pooled requests.Session, so connections are reused.
+      - videos.list requests are chunked at MAX_IDS_PER_REQUEST IDs.
+      - Responses are stored with their ETag; repeat requests send
+        If-None-Match and reuse the stored payload on 304 Not Modified.
+      - A quota ledger (persisted per Pacific-time day in API_CACHE_PATH)
+        counts the units spent, and requests that would go past
+        `daily_quota` raise QuotaExceededError instead of being sent.
+    """
+
+    def __init__(self, api_key, cache_path=API_CACHE_PATH, daily_quota=DAILY_QUOTA):
+        self.api_key = api_key
+        self.daily_quota = daily_quota
+        self.session = build_session(POOL_SIZE)
+        self.requests_sent = 0
+        # Set once a request was refused for lack of quota, so callers know
+        # this run's results are incomplete
+        self.quota_exceeded = False
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS etag_cache (
+                request_key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS quota_ledger (
+                day TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                units INTEGER NOT NULL,
+                PRIMARY KEY (day, endpoint)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def quota_day():
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def quota_used(self):
+        """Units spent so far today, across all runs."""
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(units), 0) FROM quota_ledger WHERE day = ?", (self.quota_day(),)
+        ).fetchone()
+        return row[0]
+
+    def quota_remaining(self):
+        return max(0, self.daily_quota - self.quota_used())
+
+    def quota_summary(self):
+        """Return today's ledger as {endpoint: {"calls": n, "units": n}}."""
+        rows = self._conn.execute(
+            "SELECT endpoint, calls, units FROM quota_ledger WHERE day = ? ORDER BY endpoint",
+            (self.quota_day(),)
+        ).fetchall()
+        return {endpoint: {"calls": calls, "units": units} for endpoint, calls, units in rows}
+
+    def _charge(self, endpoint):
+        cost = QUOTA_COSTS.get(endpoint, 1)
+        with self._lock:
+            used = self.quota_used()
+            if used + cost > self.daily_quota:
+                self.quota_exceeded = True
+                raise QuotaExceededError(
+                    f"{endpoint} request needs {cost} units but only "
+                    f"{self.daily_quota - used} of {self.daily_quota} remain today"
+                )
+            self._conn.execute("""
+                INSERT INTO quota_ledger (day, endpoint, calls, units) VALUES (?, ?, 1, ?)
+                ON CONFLICT(day, endpoint) DO UPDATE SET
+                    calls = calls + 1, units = units + excluded.units
+            """, (self.quota_day(), endpoint, cost))
+            self._conn.commit()
+
+    def get(self, endpoint, params):
+        """
+        Send a GET to `endpoint` (e.g. "search", "videos") and return the JSON body.
+        Steps:
+          1. Charge the request to the quota ledger (raises QuotaExceededError).
+          2. Send If-None-Match with the ETag stored for the same parameters.
+          3. On 304, return the stored payload; otherwise store the new one.
+        """
+        request_key = endpoint + "?" + json.dumps(params, sort_keys=True)
+        with self._lock:
+            cached = self._conn.execute(
+                "SELECT etag, payload FROM etag_cache WHERE request_key = ?", (request_key,)
+            ).fetchone()
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        self._charge(endpoint)
+        response = self.session.get(
+            f"{BASE_URL}/{endpoint}",
+            params={**params, "key": self.api_key},
+            headers=headers,
+            timeout=REQUEST_TIMEOUT_SECONDS
+        )
+        self.requests_sent += 1
+        if response.status_code == 304 and cached:
+            self.not_modified += 1
+            return json.loads(zlib.decompress(cached[1]))
+        response.raise_for_status()
+        data = response.json()
+        etag = response.headers.get("ETag") or data.get("etag")
+        if etag:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO etag_cache (request_key, etag, payload) VALUES (?, ?, ?)",
+                    (request_key, etag, zlib.compress(response.content))
+                )
+                self._conn.commit()
+        return data
+
+    def search(self, query, max_results=5, order="viewCount"):
+        """Run search.list for videos and return the result items."""
+        params = {
+            "part": "snippet",
+            "q": query,
+            "type": "video",
+            "maxResults": max_results,
+            "order": order,
+        }
+        return self.get("search", params).get("items", [])
+
+    def videos(self, video_ids, part="statistics,snippet"):
+        """
+        Run videos.list for any number of IDs, MAX_IDS_PER_REQUEST at a time.
+        Duplicate IDs are requested once. Returns the items in request order.
+        If the quota runs out part way, the QuotaExceededError carries the
+        items fetched so far in `partial_items`.
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+        items = []
+        for start in range(0, len(unique_ids), MAX_IDS_PER_REQUEST):
+            chunk = unique_ids[start:start + MAX_IDS_PER_REQUEST]
+            params = {"part": part, "id": ",".join(chunk), "maxResults": MAX_IDS_PER_REQUEST}
+            try:
+                items.extend(self.get("videos", params).get("items", []))
+            except QuotaExceededError as e:
+                e.partial_items = items
+                raise
+        return items
+
+    def close(self):
+        self.session.close()
+        self._conn.close()
@@ -1,21 +1,32 @@
 import os
-import requests
 import json
 import re
 import time
 import subprocess
+import threading
+import queue
+import sqlite3
+import zlib
+import html
+import tempfile
 from collections import Counter
+import numpy as np
 from dotenv import load_dotenv
-from description_processor import extract_search_terms
-import torch
-import whisper
+from description_processor import extract_search_terms_batch
 from db_handler import init_db, insert_results
+from youtube_client import YouTubeClient, QuotaExceededError
+from checkpoints import run_stage
 
 def load_whisper_model(model_size="small"):
     """
     Load OpenAI Whisper model for audio transcription.
     Attempts to use Apple Silicon GPU (MPS) if available; otherwise CPU.
+    torch and whisper are imported here rather than at module import,
+    since importing them alone takes seconds.
     """
+    import torch
+    import whisper
+
     model = whisper.load_model(model_size)
     try:
         if torch.backends.mps.is_available():
@@ -29,16 +40,169 @@ def load_whisper_model(model_size="small"):
         model = model.to("cpu")
     return model
 
-WHISPER_MODEL = load_whisper_model("tiny")
+WHISPER_MODEL_SIZE = "tiny"
+# None lets Whisper detect the language
+WHISPER_LANGUAGE = None
+_whisper_local = threading.local()
+_whisper_lock = threading.Lock()
+
+# Video pipeline (process_videos): yt-dlp downloads feed a Whisper pool,
+# which feeds a batched NLP stage. torch's intra-op thread count is
+# process-wide, so process_videos sets it once, to the cores divided among
+# the TRANSCRIBE_WORKERS, so that together they use all CPU cores.
+DOWNLOAD_WORKERS = 3
+TRANSCRIBE_WORKERS = max(1, (os.cpu_count() or 1) // 2)
+# Downloaded files waiting for Whisper; downloads pause when this is full
+TRANSCRIBE_QUEUE_SIZE = 4
+NLP_STAGE_BATCH_SIZE = 8
+NLP_STAGE_WAIT_SECONDS = 1.0
+
+# Audio acquisition:
+#   "stream" - pipe yt-dlp's bestaudio through ffmpeg straight into a 16 kHz
+#              float32 buffer in memory; no intermediate file
+#   "file"   - download an mp3 with yt-dlp, then decode it
+AUDIO_MODE = "stream"
+FFMPEG_BIN = "ffmpeg"
+FFPROBE_BIN = "ffprobe"
+SAMPLE_RATE = 16000           # what Whisper expects
+AUDIO_CHUNK_BYTES = 1 << 16
+
+# Use a video's existing subtitles (manual first, then auto-generated)
+# before falling back to Whisper
+USE_CAPTIONS = True
+CAPTION_LANGS = "en.*"
+# Transcript cache "model size" under which captions are stored
+CAPTIONS_CACHE_KEY = "captions"
+
+# How much of each video to transcribe. "head" and "windows" keep long
+# videos from costing hour-long Whisper runs, at the price of a partial
+# transcript, so they are opt-in:
+#   "full"    - everything
+#   "head"    - the first TRANSCRIBE_MAX_SECONDS
+#   "windows" - TRANSCRIBE_WINDOWS evenly spaced windows of
+#               TRANSCRIBE_WINDOW_SECONDS each (needs the duration; falls
+#               back to "head" when it is unknown)
+TRANSCRIBE_POLICY = "full"
+TRANSCRIBE_MAX_SECONDS = 600
+TRANSCRIBE_WINDOWS = 4
+TRANSCRIBE_WINDOW_SECONDS = 120
+
+# Transcripts are stored zlib-compressed, keyed by (video ID, model size,
+# language, sampling), so popular videos that come back day after day are
+# never re-downloaded, and a transcript of part of a video is never served
+# for a different sampling policy (see sampling_key).
+TRANSCRIPT_CACHE_PATH = "transcript_cache.db"
+_transcript_conn = None
+_transcript_lock = threading.Lock()
+
+def get_whisper_model():
+    """
+    Return this thread's Whisper model, loading it on first transcription.
+    Each thread gets its own copy: Whisper's decoder installs kv-cache hooks
+    on the model during transcribe(), so one model cannot serve two threads
+    at once. Loads are serialized so the weights are only downloaded once.
+    """
+    model = getattr(_whisper_local, "model", None)
+    if model is None:
+        with _whisper_lock:
+            model = load_whisper_model(WHISPER_MODEL_SIZE)
+        _whisper_local.model = model
+    return model
+
+def sampling_key(policy=None):
+    """
+    Describe the audio a transcript covers under `policy` (defaults to
+    TRANSCRIBE_POLICY), including the limits that shape it, e.g. "full",
+    "head:600" or "windows:4x120".
+    """
+    policy = policy or TRANSCRIBE_POLICY
+    if policy == "head":
+        return f"head:{TRANSCRIBE_MAX_SECONDS}"
+    if policy == "windows":
+        return f"windows:{TRANSCRIBE_WINDOWS}x{TRANSCRIBE_WINDOW_SECONDS}"
+    return policy
+
+def get_transcript_connection():
+    """
+    Open (once) the SQLite connection backing the transcript cache.
+    A cache created before transcripts were keyed by sampling is migrated:
+    captions are kept (they always cover the whole video), while Whisper
+    transcripts of unknown coverage are dropped and redone on demand.
+    """
+    global _transcript_conn
+    if _transcript_conn is None:
+        conn = sqlite3.connect(TRANSCRIPT_CACHE_PATH, check_same_thread=False, timeout=30)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(transcripts)")]
+        if columns and "sampling" not in columns:
+            conn.execute("ALTER TABLE transcripts RENAME TO transcripts_old")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT NOT NULL,
+                model_size TEXT NOT NULL,
+                language TEXT NOT NULL,
+                sampling TEXT NOT NULL,        -- see sampling_key
+                transcript BLOB NOT NULL,      -- zlib-compressed UTF-8 text
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (video_id, model_size, language, sampling)
+            )
+        """)
+        if columns and "sampling" not in columns:
+            conn.execute("""
+                INSERT INTO transcripts (video_id, model_size, language, sampling, transcript, created_at)
+                SELECT video_id, model_size, language, 'full', transcript, created_at
+                FROM transcripts_old WHERE model_size = ?
+            """, (CAPTIONS_CACHE_KEY,))
+            conn.execute("DROP TABLE transcripts_old")
+        conn.commit()
+        _transcript_conn = conn
+    return _transcript_conn
+
+def load_cached_transcript(video_id, model_size=None, language=None, sampling=None):
+    """
+    Return the stored transcript for a video, or None if it was never transcribed
+    with this model size, language and sampling (defaults to sampling_key()).
+    """
+    model_size = model_size or WHISPER_MODEL_SIZE
+    language = language or WHISPER_LANGUAGE or "auto"
+    sampling = sampling or sampling_key()
+    with _transcript_lock:
+        row = get_transcript_connection().execute(
+            "SELECT transcript FROM transcripts "
+            "WHERE video_id = ? AND model_size = ? AND language = ? AND sampling = ?",
+            (video_id, model_size, language, sampling)
+        ).fetchone()
+    if row is None:
+        return None
+    return zlib.decompress(row[0]).decode("utf-8")
+
+def save_transcript(video_id, text, model_size=None, language=None, sampling=None):
+    """
+    Store a transcript (including an empty one, for videos without speech).
+    """
+    model_size = model_size or WHISPER_MODEL_SIZE
+    language = language or WHISPER_LANGUAGE or "auto"
+    sampling = sampling or sampling_key()
+    with _transcript_lock:
+        conn = get_transcript_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO transcripts (video_id, model_size, language, sampling, transcript) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (video_id, model_size, language, sampling, zlib.compress(text.encode("utf-8")))
+        )
+        conn.commit()
 
 load_dotenv()
 API_KEY = os.getenv("YOUTUBE_API_KEY")
-BASE_URL = "https://www.googleapis.com/youtube/v3"
+_client = None
+_client_lock = threading.Lock()
 
 MAX_RESULTS_GENERAL = 3
 MAX_RESULTS_SPECIFIC = 3
 MAX_GENERAL_SEARCHES = 2
 MAX_TERMS = 5
+# Terms too generic to search for; the NLP stage does not count them as matches
+EXCLUDE_TERMS = {"n8n", "chatgpt", "llm", "youtube", "zapier", "make", "pabbly", "ifttt", "nadn", "github"}
+# Pause between yt-dlp downloads; API calls are paced by the quota ledger
 THROTTLE_SECONDS = 2
 
 
@@ -50,6 +214,17 @@ def normalize_term(term):
     term_clean = re.sub(r'\s+', ' ', term_clean)
     return term_clean.title()
 
+def get_client():
+    """
+    Return the shared YouTubeClient (pooled session, ETag cache, quota ledger),
+    creating it on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = YouTubeClient(API_KEY)
+        return _client
+
 def search_youtube(query, max_results=5, order="viewCount"):
     """
     Search YouTube using the official API.
@@ -59,36 +234,25 @@ def search_youtube(query, max_results=5, order="viewCount"):
         order: Sorting method (viewCount, relevance, etc.)
     Returns:
         List of search result items
+    Raises QuotaExceededError when the daily quota cannot cover the search.
     """
-    params = {
-        "part": "snippet",
-        "q": query,
-        "type": "video",
-        "maxResults": max_results,
-        "order": order,
-        "key": API_KEY,
-    }
-    response = requests.get(f"{BASE_URL}/search", params=params)
-    response.raise_for_status()
-    time.sleep(THROTTLE_SECONDS)
-    return response.json().get("items", [])
+    return get_client().search(query, max_results=max_results, order=order)
 
 def get_video_details(video_ids):
     """
     Fetch video statistics and snippet details for a list of video IDs.
-    Returns empty list if no IDs provided.
+    Requests are chunked at the API's 50-ID limit.
+    Returns empty list if no IDs provided. If the daily quota runs out, the
+    details fetched so far are returned and the rest are skipped.
     """
     if not video_ids:
         return []
-    params = {
-        "part": "statistics,snippet",
-        "id": ",".join(video_ids),
-        "key": API_KEY,
-    }
-    response = requests.get(f"{BASE_URL}/videos", params=params)
-    response.raise_for_status()
-    time.sleep(THROTTLE_SECONDS)
-    return response.json().get("items", [])
+    try:
+        return get_client().videos(video_ids)
+    except QuotaExceededError as e:
+        print(f"Quota exhausted while fetching video details: got {len(e.partial_items)} "
+              f"of {len(set(video_ids))} videos ({e})")
+        return list(e.partial_items)
 
 def collect_initial_videos():
     """
@@ -107,7 +271,11 @@ def collect_initial_videos():
 
     for term in search_terms:
         print(f"Searching for: {term}")
-        search_results = search_youtube(term, max_results=MAX_RESULTS_GENERAL)
+        try:
+            search_results = search_youtube(term, max_results=MAX_RESULTS_GENERAL)
+        except QuotaExceededError as e:
+            print(f"Stopping general searches: {e}")
+            break
         video_ids = [item["id"]["videoId"] for item in search_results if item["id"]["videoId"] not in seen_ids]
 
         if not video_ids:
@@ -132,29 +300,22 @@ def collect_initial_videos():
 def extract_search_terms_from_videos(videos):
     """
     Transcribe videos using Whisper, extract search terms, normalize, filter, and count.
+    Videos go through the download/transcribe/NLP pipeline in `process_videos`.
     Returns top terms for further specific searches.
     """
     all_terms = []
-    filter_out = [normalize_term(t) for t in [
-        "n8n", "chatgpt", "llm", "youtube", "zapier", "make", "pabbly", "ifttt", "nadn", "github"
-    ]]
+    filter_out = [normalize_term(t) for t in EXCLUDE_TERMS]
 
-    for video in videos:
-        vid = video["videoId"]
-        print(f"Transcribing initial video {vid} with Whisper...")
-        try:
-            text = transcribe_with_whisper(vid)
-            time.sleep(THROTTLE_SECONDS)
-            if text.strip():
-                extracted = extract_search_terms(text)
-                normalized_terms = [normalize_term(term) for term in extracted]
-                filtered_terms = [t for t in normalized_terms if t not in filter_out]
-                all_terms.extend(filtered_terms)
-                print(f"Transcript terms for {vid}: {filtered_terms}")
-            else:
-                print(f"No speech detected for {vid}")
-        except Exception as e:
-            print(f"Transcription failed for {vid}: {e}")
+    video_ids = [video["videoId"] for video in videos]
+    terms_by_video = process_videos(video_ids, label="initial video")
+
+    for vid in video_ids:
+        if vid not in terms_by_video:
+            continue
+        normalized_terms = [normalize_term(term) for term in terms_by_video[vid]]
+        filtered_terms = [t for t in normalized_terms if t not in filter_out]
+        all_terms.extend(filtered_terms)
+        print(f"Transcript terms for {vid}: {filtered_terms}")
 
     with open("all_extracted_terms.json", "w") as f:
         json.dump(all_terms, f, indent=2)
@@ -185,51 +346,429 @@ def download_audio(video_id):
         print(f"Failed to download audio for {video_id}: {e}")
         return None
 
-def transcribe_with_whisper(video_id):
+def sampling_segments(duration=None, policy=None):
+    """
+    Return the (start, end) second ranges of a video to transcribe under
+    `policy` (defaults to TRANSCRIBE_POLICY). `end` is None for "until the end".
+    """
+    policy = policy or TRANSCRIBE_POLICY
+    if policy == "full":
+        return [(0.0, None)]
+    if policy == "windows" and duration:
+        span = TRANSCRIBE_WINDOWS * TRANSCRIBE_WINDOW_SECONDS
+        if duration <= span:
+            return [(0.0, None)]
+        # Spread window starts evenly from 0 to (duration - window length)
+        step = (duration - TRANSCRIBE_WINDOW_SECONDS) / (TRANSCRIBE_WINDOWS - 1) if TRANSCRIBE_WINDOWS > 1 else 0
+        return [
+            (i * step, i * step + TRANSCRIBE_WINDOW_SECONDS)
+            for i in range(TRANSCRIBE_WINDOWS)
+        ]
+    if policy not in ("head", "windows"):
+        raise ValueError(f"Unknown transcription policy: {policy}")
+    return [(0.0, float(TRANSCRIBE_MAX_SECONDS))]
+
+def decode_audio(command, segments, stdin=None):
+    """
+    Run an ffmpeg `command` that writes mono 16 kHz float32 PCM to stdout and
+    keep only the samples inside `segments`.
+
+    Output is read in AUDIO_CHUNK_BYTES chunks, so memory holds the kept
+    samples plus one chunk. ffmpeg is stopped as soon as the last segment
+    has been read. Returns a float32 NumPy array (empty if nothing decoded).
+    """
+    ranges = [
+        (int(start * SAMPLE_RATE), None if end is None else int(end * SAMPLE_RATE))
+        for start, end in segments
+    ]
+    last_sample = None if any(end is None for _, end in ranges) else max(end for _, end in ranges)
+
+    proc = subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    pieces = []
+    position = 0
+    leftover = b""
+    try:
+        while last_sample is None or position < last_sample:
+            chunk = proc.stdout.read(AUDIO_CHUNK_BYTES)
+            if not chunk:
+                break
+            data = leftover + chunk
+            usable = len(data) - len(data) % 4
+            leftover = data[usable:]
+            samples = np.frombuffer(data[:usable], dtype=np.float32)
+            chunk_end = position + len(samples)
+            for start, end in ranges:
+                lo = max(start, position)
+                hi = chunk_end if end is None else min(end, chunk_end)
+                if lo < hi:
+                    pieces.append(samples[lo - position:hi - position].copy())
+            position = chunk_end
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+    if not pieces:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(pieces)
+
+def ffmpeg_pcm_command(source, duration_limit=None):
+    """
+    ffmpeg command decoding `source` (a path, or "pipe:0") to raw 16 kHz mono float32.
+    """
+    command = [FFMPEG_BIN, "-nostdin", "-loglevel", "error", "-i", source]
+    if duration_limit is not None:
+        command += ["-t", str(duration_limit)]
+    return command + ["-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+def probe_file_duration(path):
+    """
+    Duration of a local media file in seconds via ffprobe, or None if unknown.
+    """
+    try:
+        output = subprocess.run(
+            [FFPROBE_BIN, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+        return float(output)
+    except Exception:
+        return None
+
+def probe_video_duration(video_id):
     """
-    Download video audio and transcribe with Whisper model.
-    Cleans up audio file after transcription.
-    Returns transcript text.
+    Duration of a YouTube video in seconds via yt-dlp metadata, or None if unknown.
     """
-    filename = download_audio(video_id)
-    if not filename:
-        return ""
     try:
-        result = WHISPER_MODEL.transcribe(filename)
-        return result["text"]
+        output = subprocess.run(
+            ["yt-dlp", "--skip-download", "--print", "duration", f"https://www.youtube.com/watch?v={video_id}"],
+            check=True, capture_output=True, text=True
+        ).stdout.strip()
+        return float(output)
+    except Exception:
+        return None
+
+def load_audio_file(path, policy=None):
+    """
+    Decode a local audio/video file into a 16 kHz float32 buffer, keeping
+    only the parts selected by the transcription policy.
+    """
+    policy = policy or TRANSCRIBE_POLICY
+    duration = probe_file_duration(path) if policy == "windows" else None
+    segments = sampling_segments(duration, policy)
+    last_end = None if any(end is None for _, end in segments) else max(end for _, end in segments)
+    return decode_audio(ffmpeg_pcm_command(path, last_end), segments)
+
+def stream_audio(video_id, policy=None, duration=None):
+    """
+    Stream a video's bestaudio from yt-dlp through an ffmpeg pipe straight
+    into a 16 kHz float32 buffer, without writing any file.
+    Only the parts selected by the transcription policy are kept, and both
+    processes are stopped once the last selected sample has been read.
+    Returns the buffer, or None on failure.
+    """
+    policy = policy or TRANSCRIBE_POLICY
+    if policy == "windows" and duration is None:
+        duration = probe_video_duration(video_id)
+    segments = sampling_segments(duration, policy)
+    last_end = None if any(end is None for _, end in segments) else max(end for _, end in segments)
+
+    downloader = subprocess.Popen(
+        ["yt-dlp", "-q", "-f", "bestaudio", "-o", "-", f"https://www.youtube.com/watch?v={video_id}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        audio = decode_audio(ffmpeg_pcm_command("pipe:0", last_end), segments, stdin=downloader.stdout)
+    except Exception as e:
+        print(f"Failed to stream audio for {video_id}: {e}")
+        return None
     finally:
-        if os.path.exists(filename):
-            os.remove(filename)
+        downloader.stdout.close()
+        if downloader.poll() is None:
+            downloader.kill()
+        downloader.wait()
+    if audio.size == 0:
+        print(f"Failed to stream audio for {video_id}: no audio decoded")
+        return None
+    return audio
+
+def fetch_audio(video_id):
+    """
+    Get a video's audio for Whisper according to AUDIO_MODE.
+    Returns a float32 buffer ("stream"), a downloaded file path ("file"),
+    or None on failure.
+    """
+    if AUDIO_MODE == "stream":
+        return stream_audio(video_id)
+    return download_audio(video_id)
+
+def transcribe_audio(audio):
+    """
+    Transcribe audio with this thread's Whisper model.
+    `audio` is either a 16 kHz float32 buffer or a local file path; files are
+    decoded with the transcription policy applied first.
+    """
+    if isinstance(audio, str):
+        audio = load_audio_file(audio)
+    options = {"language": WHISPER_LANGUAGE} if WHISPER_LANGUAGE else {}
+    result = get_whisper_model().transcribe(audio, **options)
+    return result["text"]
+
+def cleanup_audio(audio):
+    """Remove a downloaded audio file; in-memory buffers need no cleanup."""
+    if isinstance(audio, str) and os.path.exists(audio):
+        os.remove(audio)
+
+def parse_subtitles(content):
+    """
+    Convert WebVTT or SRT subtitle content to plain text:
+      - Drops headers (WEBVTT, Kind:, Language:), NOTE/STYLE blocks,
+        timing lines and cue identifiers (SRT numbers; only the line right
+        before a timing line, so captions that are just a number are kept).
+      - Strips inline tags (<c>, <i>, karaoke timestamps) and HTML entities.
+      - Auto-generated captions repeat each line across rolling cues, so a
+        line identical to the previous one is skipped.
+    Returns the caption text joined into a single string.
+    """
+    lines = []
+    previous = None
+    skip_block = False
+    raw_lines = content.splitlines()
+    for i, raw_line in enumerate(raw_lines):
+        line = raw_line.strip()
+        if not line:
+            skip_block = False
+            continue
+        if skip_block:
+            continue
+        if line.startswith(("NOTE", "STYLE", "REGION")):
+            skip_block = True
+            continue
+        if line == "WEBVTT" or line.startswith(("WEBVTT ", "Kind:", "Language:")):
+            continue
+        if "-->" in line or (i + 1 < len(raw_lines) and "-->" in raw_lines[i + 1]):
+            continue
+        line = html.unescape(re.sub(r"<[^>]*>", "", line)).strip()
+        if line and line != previous:
+            lines.append(line)
+            previous = line
+    return " ".join(lines)
+
+def parse_subtitle_file(path):
+    """Read a .vtt or .srt file and return its plain text (see parse_subtitles)."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_subtitles(f.read())
+
+def fetch_captions(video_id):
+    """
+    Ask yt-dlp for a video's subtitle tracks without downloading the video.
+    One extract_info call lists the manual and auto-generated tracks and
+    writes the ones matching CAPTION_LANGS (yt-dlp takes the manual track
+    for a language when both exist); manual tracks are read first.
+    yt_dlp is imported here so the module imports without it.
+    Returns (text, "manual" | "auto"), or (None, None) when no captions exist.
+    """
+    import yt_dlp
+
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    with tempfile.TemporaryDirectory() as tmp:
+        options = {
+            "skip_download": True,
+            "writesubtitles": True,
+            "writeautomaticsub": True,
+            "subtitleslangs": [CAPTION_LANGS],
+            "subtitlesformat": "vtt/srt/best",
+            "outtmpl": os.path.join(tmp, "%(id)s.%(ext)s"),
+            "quiet": True,
+            "no_warnings": True,
+        }
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=True)
+        except Exception as e:
+            print(f"Failed to fetch captions for {video_id}: {e}")
+            return None, None
+        manual_langs = info.get("subtitles") or {}
+        requested = info.get("requested_subtitles") or {}
+        for lang in sorted(requested, key=lambda lang: (lang not in manual_langs, lang)):
+            path = requested[lang].get("filepath")
+            if not path or not path.endswith((".vtt", ".srt")) or not os.path.exists(path):
+                continue
+            text = parse_subtitle_file(path)
+            if text.strip():
+                return text, "manual" if lang in manual_langs else "auto"
+    return None, None
+
+def find_existing_transcript(video_id):
+    """
+    Look for a transcript that does not need Whisper, in order:
+      1. cached captions, 2. cached Whisper transcript, 3. captions from
+         YouTube (cached for next time).
+    Returns (text, source) with source one of "cache", "manual", "auto",
+    or (None, None) when Whisper is needed.
+    """
+    # Captions always cover the whole video
+    for model_size, sampling in ((CAPTIONS_CACHE_KEY, "full"), (None, None)):
+        cached = load_cached_transcript(video_id, model_size=model_size, sampling=sampling)
+        if cached is not None:
+            return cached, "cache"
+    if USE_CAPTIONS:
+        text, kind = fetch_captions(video_id)
+        if text is not None:
+            save_transcript(video_id, text, model_size=CAPTIONS_CACHE_KEY, sampling="full")
+            return text, kind
+    return None, None
+
+def process_videos(video_ids, label="video"):
+    """
+    Run videos through a bounded, pipelined producer/consumer flow:
+      1. DOWNLOAD_WORKERS threads look for a cached transcript or existing
+         captions (find_existing_transcript) and otherwise fetch audio with
+         yt-dlp (throttled per worker; see fetch_audio).
+      2. TRANSCRIBE_WORKERS threads transcribe the audio with Whisper and
+         cache the transcripts. The queue between the two stages holds at
+         most TRANSCRIBE_QUEUE_SIZE audio buffers/files, so downloads wait when
+         Whisper is behind (backpressure, bounded memory and disk use).
+      3. The calling thread batches finished transcripts (up to
+         NLP_STAGE_BATCH_SIZE) through extract_search_terms_batch.
+    The stages overlap, so total time approaches that of the slowest stage.
+    A failure only affects its own video; it is logged and the rest continue.
+    The path each video took (cache/manual/auto/whisper) is logged and summarized.
+    Returns dict of video ID -> extracted terms (videos with speech only).
+    """
+    video_ids = list(dict.fromkeys(video_ids))
+    if not video_ids:
+        return {}
+
+    download_queue = queue.Queue()
+    transcribe_queue = queue.Queue(maxsize=TRANSCRIBE_QUEUE_SIZE)
+    # Every video produces exactly one (video_id, text, source, error) item here
+    text_queue = queue.Queue()
+    for vid in video_ids:
+        download_queue.put(vid)
+
+    def download_worker():
+        while True:
+            try:
+                vid = download_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                text, source = find_existing_transcript(vid)
+                if text is not None:
+                    print(f"Transcript for {label} {vid}: {source}")
+                    text_queue.put((vid, text, source, None))
+                    continue
+                print(f"Transcript for {label} {vid}: no captions, downloading audio for Whisper...")
+                audio = fetch_audio(vid)
+                if audio is not None:
+                    transcribe_queue.put((vid, audio))
+                else:
+                    text_queue.put((vid, None, "whisper", "audio download failed"))
+                time.sleep(THROTTLE_SECONDS)
+            except Exception as e:
+                text_queue.put((vid, None, None, e))
+
+    def transcribe_worker():
+        while True:
+            item = transcribe_queue.get()
+            if item is None:
+                return
+            vid, audio = item
+            try:
+                print(f"Transcribing {label} {vid} with Whisper...")
+                text = transcribe_audio(audio)
+                save_transcript(vid, text)
+                text_queue.put((vid, text, "whisper", None))
+            except Exception as e:
+                text_queue.put((vid, None, "whisper", e))
+            finally:
+                cleanup_audio(audio)
+
+    def close_transcribers(downloaders):
+        for thread in downloaders:
+            thread.join()
+        for _ in range(TRANSCRIBE_WORKERS):
+            transcribe_queue.put(None)
+
+    # Process-wide setting, so it is made once rather than per worker or item
+    import torch
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // TRANSCRIBE_WORKERS))
+
+    downloaders = [
+        threading.Thread(target=download_worker, name=f"yt-download-{i}", daemon=True)
+        for i in range(DOWNLOAD_WORKERS)
+    ]
+    transcribers = [
+        threading.Thread(target=transcribe_worker, name=f"yt-transcribe-{i}", daemon=True)
+        for i in range(TRANSCRIBE_WORKERS)
+    ]
+    for thread in downloaders + transcribers:
+        thread.start()
+    threading.Thread(target=close_transcribers, args=(downloaders,), daemon=True).start()
+
+    terms_by_video = {}
+    sources = {}
+    received = 0
+    while received < len(video_ids):
+        batch = [text_queue.get()]
+        while len(batch) < NLP_STAGE_BATCH_SIZE and received + len(batch) < len(video_ids):
+            try:
+                batch.append(text_queue.get(timeout=NLP_STAGE_WAIT_SECONDS))
+            except queue.Empty:
+                break
+        received += len(batch)
+
+        transcripts = {}
+        for vid, text, source, error in batch:
+            sources[vid] = source or "failed"
+            if error is not None:
+                print(f"Transcription failed for {vid}: {error}")
+            elif not text.strip():
+                print(f"No speech detected for {vid}")
+            else:
+                transcripts[vid] = text
+        if not transcripts:
+            continue
+        try:
+            for vid, terms in zip(transcripts, extract_search_terms_batch(transcripts.values(), ignore=EXCLUDE_TERMS)):
+                terms_by_video[vid] = terms
+        except Exception as e:
+            print(f"Term extraction failed for {list(transcripts)}: {e}")
+
+    for thread in transcribers:
+        thread.join()
+    print(f"Transcript sources: {dict(Counter(sources.values()))}")
+    return terms_by_video
 
 def search_specific_terms_with_transcripts(terms):
     """
     For each top term, search YouTube for relevant videos.
-    Transcribe each video and extract terms (logging purposes).
+    Run all found videos through the transcription pipeline and log their terms.
     Returns list of seen video IDs.
     """
     seen_ids = set()
+    video_ids = []
 
     for term in terms:
         query = f"n8n {term} workflow"
-        results = search_youtube(query, max_results=MAX_RESULTS_SPECIFIC, order="relevance")
+        try:
+            results = search_youtube(query, max_results=MAX_RESULTS_SPECIFIC, order="relevance")
+        except QuotaExceededError as e:
+            print(f"Stopping specific searches: {e}")
+            break
         for item in results:
             vid = item["id"]["videoId"]
             if vid in seen_ids:
                 continue
             seen_ids.add(vid)
+            video_ids.append(vid)
 
-            try:
-                print(f"Transcribing video {vid} with Whisper...")
-                text = transcribe_with_whisper(vid)
-                time.sleep(THROTTLE_SECONDS)
-                if text.strip():
-                    extracted_terms = extract_search_terms(text)
-                    normalized_terms = [normalize_term(term) for term in extracted_terms]
-                    print(f"Transcript terms for {vid}: {normalized_terms}")
-                else:
-                    print(f"No speech detected for {vid}")
-            except Exception as e:
-                print(f"Transcription failed for {vid}: {e}")
+    terms_by_video = process_videos(video_ids)
+    for vid in video_ids:
+        if vid in terms_by_video:
+            normalized_terms = [normalize_term(term) for term in terms_by_video[vid]]
+            print(f"Transcript terms for {vid}: {normalized_terms}")
 
     with open("specific_video_ids.json", "w") as f:
         json.dump(list(seen_ids), f, indent=2)
@@ -254,6 +793,7 @@ def build_video_data(video_ids):
         comment_ratio = comments / views if views > 0 else 0
         video_data.append({
             "workflow": title,
+            "video_id": video["id"],
             "platform": "YouTube",
             "popularity_metrics": {
                 "views": views,
@@ -265,9 +805,26 @@ def build_video_data(video_ids):
         })
     return video_data
 
+def quota_stage(stage, fn, *args):
+    """
+    Run a checkpointed stage that calls the YouTube API, storing whether the
+    quota had run out by the end of it next to its output, as
+    {"result": ..., "complete": bool}. The client's quota flag only covers
+    calls made in this process, so a resumed run reads the flag from the
+    checkpoint instead. Checkpoints written without it count as incomplete.
+    Returns (result, complete).
+    """
+    def run():
+        result = fn(*args)
+        return {"result": result, "complete": not get_client().quota_exceeded}
+    data = run_stage("youtube", stage, run)
+    if not isinstance(data, dict) or "complete" not in data:
+        return data, False
+    return data["result"], data["complete"]
+
 def main():
     """
-    Main execution flow:
+    Main execution flow (each stage is checkpointed; see checkpoints.run_stage):
       - Initialize database
       - Collect initial YouTube videos
       - Extract top search terms from transcripts
@@ -277,19 +834,30 @@ def main():
     """
     init_db()
     print("Collecting initial search results...")
-    initial_videos = collect_initial_videos()
+    initial_videos, initial_complete = quota_stage("initial_videos", collect_initial_videos)
 
     print("Extracting most popular normalized search terms...")
-    top_terms = extract_search_terms_from_videos(initial_videos)
+    top_terms = run_stage("youtube", "top_terms", extract_search_terms_from_videos, initial_videos)
 
     print("Searching specific terms and processing transcripts...")
-    specific_video_ids = search_specific_terms_with_transcripts(top_terms)
+    specific_video_ids, specific_complete = quota_stage(
+        "specific_video_ids", search_specific_terms_with_transcripts, top_terms
+    )
 
     print("Fetching video statistics...")
-    final_data = build_video_data(specific_video_ids)
-
-    insert_results("youtube", final_data)
+    final_data, data_complete = quota_stage("video_data", build_video_data, specific_video_ids)
+
+    # A run cut short by the API quota (in this process or in the attempt a
+    # resume picks up from) only saw some of the videos, so rows for the
+    # others are kept rather than deleted as stale
+    complete = initial_complete and specific_complete and data_complete
+    if not complete:
+        print("YouTube API quota ran out during this run; keeping videos that were not refreshed.")
+    run_stage("youtube", "inserted", lambda: insert_results("youtube", final_data, delete_missing=complete))
     print("YouTube results inserted into database.")
+    client = get_client()
+    print(f"YouTube API quota used today: {client.quota_used()}/{client.daily_quota} units "
+          f"{client.quota_summary()}, {client.not_modified}/{client.requests_sent} requests not modified")
     return final_data
 
 # ---------- ENTRY POINT ----------